@@ -0,0 +1,79 @@
+import re
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import json5
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import get_keywords
+from benchmarks.fixtures import root_path, dblp_path
+
+"""
+关键词匹配速度对比：逐个关键词的正则 vs 合并后的匹配器
+python3 -m benchmarks.bench_filter
+"""
+
+
+def get_keywords_regex(paper: dict, keywords: list):
+    """原来的实现，逐个关键词编译正则并分别搜索标题、摘要、总结"""
+    key_set = set()
+    for key in keywords:
+        pattern = re.compile(rf'\b{re.escape(key)}(?!\w)', re.IGNORECASE)
+
+        if paper['title'] and re.search(pattern, paper['title']):
+            key_set.add(key)
+        elif paper['abstract'] and re.search(pattern, paper['abstract']):
+            key_set.add(key)
+        elif paper.get('tldr') and re.search(pattern, paper['tldr']):
+            key_set.add(key)
+
+    return sorted(key_set)
+
+
+def load_papers(limit: int=None):
+    papers = []
+    for file in sorted(dblp_path.glob('*.json')):
+        for year_data in json.loads(file.read_text()).values():
+            for item in year_data:
+                papers.extend(item['papers'])
+    return papers[:limit]
+
+
+def bench(func, papers: list, keywords: list):
+    """返回(耗时, 结果)"""
+    start = time.perf_counter()
+    results = [func(paper, keywords) for paper in papers]
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=None, help='number of papers')
+    args = parser.parse_args()
+
+    conf = json5.loads(root_path.joinpath('config.json5').read_text())
+    papers = load_papers(args.limit)
+    print(f'papers: {len(papers)}')
+
+    failed = False
+    for category, groups in conf['keywords'].items():
+        keywords = [j for i in groups.values() for j in i if j.isascii()]
+        old_time, old_results = bench(get_keywords_regex, papers, keywords)
+        new_time, new_results = bench(get_keywords, papers, keywords)
+        matched = sum(1 for i in new_results if i)
+        print(f'{category:8}\tkeywords: {len(keywords)}\tmatched: {matched}\t'
+              f'regex: {old_time:.2f}s\tmatcher: {new_time:.2f}s\tspeedup: {old_time / new_time:.1f}x')
+        if old_results != new_results:
+            print(f'WARNING: {category} results differ')
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from crawler.dblp import parse_toc_page
+from benchmarks.fixtures import iter_toc_pages
+
+"""
+目录页解析速度对比
+python3 -m benchmarks.bench_parser --limit 200
+"""
+
+
+def bench(pages: list, parser: str, repeat: int):
+    """返回(条目数, 耗时, 解析结果)"""
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = [parse_toc_page(page, kind, parser) for kind, page in pages]
+    elapsed = time.perf_counter() - start
+    entries = sum(len(papers or []) for _, papers in results) * repeat
+    return entries, elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=200, help='number of toc pages')
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    pages = list(iter_toc_pages(args.limit))
+    size = sum(len(page) for _, page in pages)
+    print(f'pages: {len(pages)}\tsize: {size / 1024 / 1024:.1f} MB')
+
+    outputs = {}
+    for backend in ('soup', 'lxml'):
+        entries, elapsed, outputs[backend] = bench(pages, backend, args.repeat)
+        print(f'{backend:5}\tentries: {entries}\ttime: {elapsed:.2f}s\t{entries / elapsed:.0f} entries/s')
+
+    if outputs['soup'] != outputs['lxml']:
+        print('WARNING: backends produced different results')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
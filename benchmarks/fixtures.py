@@ -0,0 +1,184 @@
+import json
+from html import escape
+from pathlib import Path
+
+"""
+基准测试数据
+优先使用benchmarks/fixtures中保存的真实数据（python3 -m benchmarks.record），不存在时根据data/dblp生成：
+    fixtures/dblp/index/{conf,journals}/*.html  会议/期刊主页
+    fixtures/dblp/{conf,journals}/*.html        目录页
+    fixtures/s2/*.json                          Semantic Scholar批量查询结果
+    fixtures/paper/{ndss,usenix,acm}/*.html     论文页面，只能录制
+    fixtures/corpus/*.json                      data/dblp的副本
+"""
+
+root_path = Path(__file__).parent.parent
+fixtures_path = Path(__file__).parent.joinpath('fixtures')
+dblp_path = root_path.joinpath('data', 'dblp')
+corpus_path = fixtures_path.joinpath('corpus')
+
+
+def get_corpus_path():
+    """论文数据，优先使用录制的副本，不受之后爬取的影响"""
+    return corpus_path if any(corpus_path.glob('*.json')) else dblp_path
+
+
+def iter_corpus(limit: int=None):
+    """返回(dblp key, 数据)"""
+    for file in sorted(get_corpus_path().glob('*.json'))[:limit]:
+        yield file.stem.replace('_', '/', 1), json.loads(file.read_text())
+
+
+def make_entry(paper: dict, kind: str, idx: int):
+    """生成一篇文章的dblp条目"""
+    key = f'x/y/E{idx}'
+    url = escape(paper['url'] or '', quote=True)
+    authors = ', '.join(
+        f'<span itemprop="author" itemscope itemtype="http://schema.org/Person">'
+        f'<a href="https://dblp.org/pid/00/{idx}-{i}.html" itemprop="url">'
+        f'<span itemprop="name" title="{escape(name, quote=True)}">{escape(name)}</span></a></span>'
+        for i, name in enumerate(filter(None, paper['authors'].split(', ')))
+    )
+    return (
+        f'<li class="entry {kind} toc" id="{key}" itemscope itemtype="http://schema.org/ScholarlyArticle">'
+        f'<link itemprop="additionalType" href="https://dblp.org/rdf/schema#Publication">'
+        f'<div class="box"><img alt="" title="Publication" src="https://dblp.org/img/n.png"></div>'
+        f'<nav class="publ"><ul>'
+        f'<li class="drop-down"><div class="head"><a href="{url}"><img alt="" src="https://dblp.org/img/paper.dark.hollow.16x16.png" class="icon"></a></div>'
+        f'<div class="body"><p><b>view</b></p><ul><li class="ee"><a href="{url}" itemprop="url">electronic edition</a></li></ul></div></li>'
+        f'<li class="drop-down"><div class="head"><a href="https://dblp.org/rec/{key}.html?view=bibtex"><img alt="" src="https://dblp.org/img/download.dark.hollow.16x16.png" class="icon"></a></div>'
+        f'<div class="body"><p><b>export record</b></p><ul><li><a href="https://dblp.org/rec/{key}.html?view=bibtex">BibTeX</a></li>'
+        f'<li><a href="https://dblp.org/rec/{key}.ris">RIS</a></li><li><a href="https://dblp.org/rec/{key}.nt">RDF N-Triples</a></li></ul></div></li>'
+        f'<li class="drop-down"><div class="head"><a href="https://dblp.org/rec/{key}.html"><img alt="" src="https://dblp.org/img/link.dark.hollow.16x16.png" class="icon"></a></div>'
+        f'<div class="body"><p><b>share record</b></p><ul><li><a href="https://bsky.app/intent/compose?text={key}">Bluesky</a></li></ul></div></li>'
+        f'</ul></nav>'
+        f'<cite class="data tts-content" itemprop="headline">{authors}:<br> '
+        f'<span class="title">{escape(paper["title"])}.</span> '
+        f'<a href="https://dblp.org/db/{key}.html"><span itemprop="isPartOf" itemscope itemtype="http://schema.org/Periodical">'
+        f'<span itemprop="name">VENUE</span></span></a> <span itemprop="pagination">1-20</span></cite>'
+        f'<meta property="genre" content="computer science"></li>\n'
+    )
+
+
+def make_toc_page(item: dict):
+    """根据一个目录的数据生成dblp目录页，返回(类型, 网页)"""
+    if 'journals_title' in item:
+        kind = 'journals'
+        title = item['journals_title']
+        head = ''
+        entry_kind = 'article'
+    else:
+        kind = 'conf'
+        title = item['conf_title']
+        conf_url = escape(item.get('conf_url') or '', quote=True)
+        head = (
+            f'<ul class="publ-list"><li class="entry editor toc" itemscope itemtype="http://schema.org/Book">'
+            f'<nav class="publ"><ul><li class="drop-down"><div class="head"><a href="{conf_url}">'
+            f'<img alt="" src="https://dblp.org/img/paper.dark.hollow.16x16.png" class="icon"></a></div></li></ul></nav>'
+            f'<cite class="data tts-content"><span class="title">{escape(title)}</span></cite></li></ul>\n'
+        )
+        entry_kind = 'inproceedings'
+
+    entries = ''.join(make_entry(paper, entry_kind, idx) for idx, paper in enumerate(item['papers']))
+    page = (
+        f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="UTF-8"><title>dblp: {escape(title)}</title></head>\n'
+        f'<body class="db-page"><div id="main"><header id="headline" class="headline noline"><h1>{escape(title)}</h1></header>\n'
+        f'{head}<header class="h2"><h2>Session</h2></header><ul class="publ-list">\n{entries}</ul></div></body></html>\n'
+    )
+    return kind, page
+
+
+def iter_toc_pages(limit: int=None, files: int=None):
+    """目录页数据，返回(类型, 网页)，limit为目录页数量，files为论文数据文件数量"""
+    count = 0
+    for kind in ('conf', 'journals'):
+        for file in sorted(fixtures_path.joinpath('dblp', kind).glob('*.html')):
+            yield kind, file.read_text()
+            count += 1
+    if count:
+        return
+
+    for _, data in iter_corpus(files):
+        for year_data in data.values():
+            for item in year_data:
+                if limit is not None and count >= limit:
+                    return
+                yield make_toc_page(item)
+                count += 1
+
+
+def make_conf_index_page(data: dict):
+    """根据会议数据生成dblp会议主页"""
+    sections = ''
+    for year, year_data in sorted(data.items(), reverse=True):
+        entries = ''.join(
+            f'<li class="entry editor toc"><nav class="publ"><ul><li class="drop-down"><div class="head">'
+            f'<a href="{escape(item["dblp_url"], quote=True)}"><img alt="" src="https://dblp.org/img/paper.dark.hollow.16x16.png" class="icon"></a>'
+            f'</div></li></ul></nav><cite class="data tts-content"><span class="title">{escape(item.get("conf_title") or "")}</span></cite></li>'
+            for item in year_data
+        )
+        sections += f'<header class="h2"><h2 id="{year}">{year}</h2></header><ul class="publ-list">{entries}</ul>'
+    return f'<!DOCTYPE html>\n<html lang="en"><body class="db-page"><div id="main">{sections}<div class="clear"></div></div></body></html>\n'
+
+
+def make_journals_index_page(data: dict):
+    """根据期刊数据生成dblp期刊主页"""
+    volumes = ''.join(
+        f'<li><a href="{escape(item["dblp_url"], quote=True)}">Volume {item["dblp_url"].rsplit("/", 1)[-1].split(".")[0]}: {year}</a></li>'
+        for year, year_data in sorted(data.items(), reverse=True) for item in year_data
+    )
+    return (
+        f'<!DOCTYPE html>\n<html lang="en"><body class="db-page"><div id="main">'
+        f'<div id="info-section" class="section"></div><ul>{volumes}</ul></div></body></html>\n'
+    )
+
+
+def iter_index_pages(limit: int=None):
+    """会议/期刊主页，返回(类型, 网页)"""
+    count = 0
+    for kind in ('conf', 'journals'):
+        for file in sorted(fixtures_path.joinpath('dblp', 'index', kind).glob('*.html')):
+            yield kind, file.read_text()
+            count += 1
+    if count:
+        return
+
+    for key, data in iter_corpus(limit):
+        kind = key.split('/')[0]
+        if kind not in ('conf', 'journals'):
+            continue
+        yield kind, make_conf_index_page(data) if kind == 'conf' else make_journals_index_page(data)
+
+
+def make_s2_response(papers: list):
+    """根据论文数据生成Semantic Scholar批量查询的结果"""
+    return [
+        {
+            'paperId': f'{idx:040x}',
+            'abstract': paper.get('abstract') or None,
+            'tldr': {'model': 'tldr@v2.0.0', 'text': paper['tldr']} if paper.get('tldr') else None,
+            'openAccessPdf': {'url': url} if (url := (paper.get('files') or {}).get('openAccessPdf')) else None,
+        } if paper.get('abstract') else None
+        for idx, paper in enumerate(papers)
+    ]
+
+
+def iter_s2_responses(batch_size: int=500, limit: int=None):
+    """Semantic Scholar批量查询的结果，返回JSON文本"""
+    count = 0
+    for file in sorted(fixtures_path.joinpath('s2').glob('*.json')):
+        yield file.read_text()
+        count += 1
+    if count:
+        return
+
+    papers = [paper for _, data in iter_corpus(limit) for year_data in data.values() for item in year_data for paper in item['papers']]
+    for i in range(0, len(papers), batch_size):
+        yield json.dumps(make_s2_response(papers[i:i+batch_size]))
+
+
+def iter_paper_pages(site: str):
+    """论文页面，返回(网址, 网页)，只有录制的数据"""
+    for file in sorted(fixtures_path.joinpath('paper', site).glob('*.html')):
+        meta = file.with_suffix('.url')
+        yield meta.read_text().strip() if meta.exists() else file.stem, file.read_text()
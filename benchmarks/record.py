@@ -0,0 +1,108 @@
+import sys
+import shutil
+import asyncio
+import argparse
+from pathlib import Path
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils import fetch, close_client, console
+from crawler.dblp import parse_conf_index, parse_journals_index
+from crawler.scholar import S2_API, S2_FIELDS, S2_BATCH_SIZE, get_paper_id, get_s2_headers
+from benchmarks.fixtures import fixtures_path, dblp_path, corpus_path, iter_corpus
+
+"""
+录制基准测试数据，需要访问网络，之后的基准测试可以离线运行
+python3 -m benchmarks.record --venues conf/ndss,conf/uss,journals/tdsc --year 2022:2023 --papers 20
+"""
+
+PAPER_SITES = {
+    'ndss': 'ndss-symposium.org/ndss-paper/',
+    'usenix': 'usenix.org/conference/',
+    'acm': 'doi.org/10.1145/',
+}
+
+
+def save(file: Path, text: str):
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_text(text)
+
+
+async def record_dblp(keys: list, start_year: str, end_year: str):
+    """会议/期刊主页和目录页"""
+    for key in keys:
+        kind, name = key.split('/')
+        index = await fetch(f'https://dblp.uni-trier.de/db/{key}/index.html')
+        if not index:
+            console.print(f'Failed: {key}', style='bold red')
+            continue
+        save(fixtures_path.joinpath('dblp', 'index', kind, f'{name}.html'), index)
+
+        soup = BeautifulSoup(index, 'html.parser')
+        href_list = (parse_journals_index if kind == 'journals' else parse_conf_index)(soup, start_year, end_year)
+        for idx, (year, href) in enumerate(href_list):
+            if page := await fetch(href):
+                save(fixtures_path.joinpath('dblp', kind, f'{name}_{year}_{idx}.html'), page)
+        console.print(f'{key}: {len(href_list)} tocs', style='bold green')
+
+
+async def record_s2(papers: list):
+    """Semantic Scholar批量查询的原始结果"""
+    ids = [i for i in map(get_paper_id, papers) if i]
+    for idx in range(0, len(ids), S2_BATCH_SIZE):
+        ret = await fetch(f'{S2_API}/paper/batch', headers=get_s2_headers(), params={'fields': S2_FIELDS},
+                          method='POST', data={'ids': ids[idx:idx+S2_BATCH_SIZE]})
+        if ret:
+            save(fixtures_path.joinpath('s2', f'batch_{idx // S2_BATCH_SIZE}.json'), ret)
+    console.print(f's2: {len(ids)} ids', style='bold green')
+
+
+async def record_papers(papers: list, limit: int):
+    """NDSS/USENIX/ACM论文页面，网址保存在同名的.url文件中"""
+    for site, pattern in PAPER_SITES.items():
+        urls = [paper['url'] for paper in papers if pattern in (paper.get('url') or '')][:limit]
+        for idx, url in enumerate(urls):
+            if page := await fetch(url):
+                file = fixtures_path.joinpath('paper', site, f'{idx}.html')
+                save(file, page)
+                save(file.with_suffix('.url'), url)
+        console.print(f'{site}: {len(urls)} pages', style='bold green')
+
+
+async def record(args):
+    keys = args.venues.split(',')
+    start_year, end_year = sorted(args.year.split(':'))
+    papers = [
+        paper
+        for key, data in iter_corpus() if key in keys
+        for year, year_data in data.items() if start_year <= year <= end_year
+        for item in year_data for paper in item['papers']
+    ]
+    try:
+        await record_dblp(keys, start_year, end_year)
+        await record_s2(papers)
+        await record_papers(papers, args.papers)
+    finally:
+        await close_client()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--venues', type=str, default='conf/ndss,conf/uss,journals/tdsc', help='dblp keys')
+    parser.add_argument('--year', type=str, metavar='start:end', default='2022:2023')
+    parser.add_argument('--papers', type=int, default=20, help='paper pages per site')
+    parser.add_argument('--no-corpus', action='store_true', help='do not copy data/dblp')
+    args = parser.parse_args()
+
+    # 先复制论文数据，之后的爬取不影响基准测试
+    if not args.no_corpus:
+        shutil.rmtree(corpus_path, ignore_errors=True)
+        shutil.copytree(dblp_path, corpus_path)
+        console.print(f'corpus: {len(list(corpus_path.glob("*.json")))} files', style='bold green')
+
+    asyncio.run(record(args))
+
+
+if __name__ == '__main__':
+    main()
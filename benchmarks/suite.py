@@ -0,0 +1,332 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+import contextlib
+from io import StringIO
+from pathlib import Path
+from bs4 import BeautifulSoup
+from unittest import mock
+
+import json5
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+# 离线运行，避免translators导入时联网检测地区
+os.environ.setdefault('translators_default_region', 'EN')
+
+import crawler.dblp
+import crawler.scholar
+import crawler.libpaper.common
+import crawler.libpaper.ndss
+import crawler.libpaper.usenix
+from store import dump_data, load_data
+from utils import get_keywords, get_matcher, filter_keywords, filter_categories
+from openccf import make_bitable, make_database
+from benchmarks.fixtures import root_path, iter_corpus, iter_index_pages, iter_toc_pages, iter_s2_responses, iter_paper_pages
+
+"""
+离线基准测试：解析、补充、筛选、序列化各阶段的吞吐量和峰值内存，并与保存的基线比较
+python3 -m benchmarks.suite                     运行所有阶段
+python3 -m benchmarks.suite --save-baseline     保存为基线
+python3 -m benchmarks.suite --stages parse_conf,filter_keywords --repeat 5
+"""
+
+baseline_file = Path(__file__).parent.joinpath('baseline.json')
+TOLERANCE = 0.2     # 吞吐量下降或内存增长超过该比例时视为退化
+
+stages = {}
+
+
+def stage(name: str):
+    """注册阶段，setup(args)返回run()，run()返回处理的条目数，没有数据时返回None"""
+    def decorator(setup):
+        stages[name] = setup
+        return setup
+    return decorator
+
+
+async def fake_fetch(pages: dict, url: str, *args, **kwargs):
+    return pages.get(url)
+
+
+def patch_fetch(pages: dict, *modules):
+    """替换模块中的fetch，只返回录制的网页"""
+    stack = contextlib.ExitStack()
+    for module in modules:
+        stack.enter_context(mock.patch.object(module, 'fetch', lambda url, *a, **kw: fake_fetch(pages, url)))
+    return stack
+
+
+def load_papers(limit: int=None):
+    return [
+        {**paper, 'year': year, 'dblp_url': item['dblp_url']}
+        for _, data in iter_corpus(limit)
+        for year, year_data in data.items() for item in year_data for paper in item['papers']
+    ]
+
+
+def load_keywords():
+    conf = json5.loads(root_path.joinpath('config.json5').read_text())
+    return conf['keywords']
+
+
+@stage('parse_conf_index')
+def setup_conf_index(args):
+    pages = [page for kind, page in iter_index_pages(args.limit) if kind == 'conf']
+
+    def run():
+        return sum(len(crawler.dblp.parse_conf_index(BeautifulSoup(page, 'html.parser'), '0000', '9999')) for page in pages)
+    return run if pages else None
+
+
+@stage('parse_journals_index')
+def setup_journals_index(args):
+    pages = [page for kind, page in iter_index_pages(args.limit) if kind == 'journals']
+
+    def run():
+        return sum(len(crawler.dblp.parse_journals_index(BeautifulSoup(page, 'html.parser'), '0000', '9999')) for page in pages)
+    return run if pages else None
+
+
+def setup_toc(args, kind: str, parse_func):
+    """目录页解析，fetch返回录制的网页，不补充摘要"""
+    pages = {f'https://dblp.org/db/{kind}/bench/{idx}.html': page for idx, (k, page) in enumerate(iter_toc_pages(files=args.limit)) if k == kind}
+
+    async def parse_all():
+        return await asyncio.gather(*[parse_func('2023', url, {}) for url in pages])
+
+    async def no_enrich(papers: list, callback=None):
+        return papers
+
+    def run():
+        with patch_fetch(pages, crawler.dblp), mock.patch.object(crawler.dblp, 'enrich_papers', no_enrich), \
+                contextlib.redirect_stdout(StringIO()):
+            results = asyncio.run(parse_all())
+        return sum(len(result[1]['papers']) for result in results if isinstance(result, tuple))
+    return run if pages else None
+
+
+@stage('parse_conf')
+def setup_parse_conf(args):
+    return setup_toc(args, 'conf', crawler.dblp.parse_conf)
+
+
+@stage('parse_journals')
+def setup_parse_journals(args):
+    return setup_toc(args, 'journals', crawler.dblp.parse_journals)
+
+
+@stage('enrich_s2')
+def setup_enrich_s2(args):
+    """Semantic Scholar批量查询结果的解析"""
+    responses = list(iter_s2_responses(crawler.scholar.S2_BATCH_SIZE, args.limit))
+    ids = [f'DOI:10.0/{idx}' for idx in range(len(responses) * crawler.scholar.S2_BATCH_SIZE)]
+
+    def run():
+        batches = iter(responses)
+
+        async def fake_batch(*a, **kw):
+            return next(batches)
+
+        with mock.patch.object(crawler.scholar, 'fetch', fake_batch):
+            results = asyncio.run(crawler.scholar.get_semantic_scholar_batch(ids))
+        return len(results)
+    return run if responses else None
+
+
+def setup_paper_pages(site: str, parse_func, *modules):
+    """论文页面解析，只有录制的数据"""
+    pages = dict(iter_paper_pages(site))
+
+    async def parse_all():
+        return await asyncio.gather(*[parse_func({'url': url, 'files': {}}) for url in pages])
+
+    def run():
+        with patch_fetch(pages, *modules):
+            results = asyncio.run(parse_all())
+        return sum(1 for paper in results if paper.get('status') != 'error')
+    return run if pages else None
+
+
+@stage('parse_ndss')
+def setup_parse_ndss(args):
+    return setup_paper_pages('ndss', crawler.libpaper.ndss.parse_ndss_symposium_org, crawler.libpaper.ndss)
+
+
+@stage('parse_usenix')
+def setup_parse_usenix(args):
+    return setup_paper_pages('usenix', crawler.libpaper.usenix.parse_usenix_org, crawler.libpaper.usenix)
+
+
+@stage('parse_acm')
+def setup_parse_acm(args):
+    return setup_paper_pages('acm', crawler.libpaper.common.parse_doi_org, crawler.libpaper.common)
+
+
+@stage('get_keywords')
+def setup_get_keywords(args):
+    """逐篇论文匹配所有类别的关键词"""
+    papers = load_papers(args.limit)
+    matchers = [get_matcher(tuple(keywords)) for keywords in load_keywords().values()]
+
+    def run():
+        for paper in papers:
+            for matcher in matchers:
+                get_keywords(paper, matcher)
+        return len(papers)
+    return run if papers else None
+
+
+@stage('filter_keywords')
+def setup_filter_keywords(args):
+    """按会议/期刊筛选，单个类别和所有类别一次遍历"""
+    corpus = [data for _, data in iter_corpus(args.limit)]
+    keywords_dict = load_keywords()
+    matchers = {category: get_matcher(tuple(keywords)) for category, keywords in keywords_dict.items()}
+    count = sum(len(item['papers']) for data in corpus for year_data in data.values() for item in year_data)
+
+    def run():
+        for data in corpus:
+            for keywords in keywords_dict.values():
+                filter_keywords(data, keywords)
+            filter_categories(data, matchers)
+        return count
+    return run if corpus else None
+
+
+def setup_make_records(args, func, batch: int):
+    """推送数据的构建，使用筛选后的论文"""
+    corpus = [data for _, data in iter_corpus(args.limit)]
+    keywords_dict = load_keywords()
+    matchers = {category: get_matcher(tuple(keywords)) for category, keywords in keywords_dict.items()}
+    papers = []
+    for data in corpus:
+        for result in filter_categories(data, matchers).values():
+            papers += result
+    for paper in papers:
+        for field in ('title_zh', 'abstract_zh'):
+            paper.setdefault(field, '')
+
+    def run():
+        for i in range(0, len(papers), batch):
+            func(papers[i:i+batch])
+        return len(papers)
+    return run if papers else None
+
+
+@stage('make_bitable')
+def setup_make_bitable(args):
+    return setup_make_records(args, make_bitable, 100)
+
+
+@stage('make_database')
+def setup_make_database(args):
+    return setup_make_records(args, make_database, 20)
+
+
+@stage('json_load')
+def setup_json_load(args):
+    bodies = [dump_data(data, 'json') for _, data in iter_corpus(args.limit)]
+
+    def run():
+        return sum(len(load_data(body, 'json')) for body in bodies)
+    return run if bodies else None
+
+
+@stage('json_save')
+def setup_json_save(args):
+    corpus = [data for _, data in iter_corpus(args.limit)]
+
+    def run():
+        for data in corpus:
+            dump_data(data, 'json')
+        return len(corpus)
+    return run if corpus else None
+
+
+def measure(run, repeat: int):
+    """返回(条目数, 最短耗时, 峰值内存)，内存单独运行一次，不影响计时"""
+    items = 0
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items = run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, best, peak
+
+
+def compare(report: dict, baseline: dict, tolerance: float):
+    """返回退化的阶段列表"""
+    regressions = []
+    for name, result in report.items():
+        if not (base := baseline.get(name)):
+            continue
+        if result['items'] != base['items']:
+            print(f'{name}: items {base["items"]} -> {result["items"]}, fixtures changed')
+            continue
+        if result['throughput'] < base['throughput'] * (1 - tolerance):
+            regressions.append(f'{name}: throughput {base["throughput"]:.0f} -> {result["throughput"]:.0f} items/s')
+        if result['peak_mb'] > base['peak_mb'] * (1 + tolerance) and result['peak_mb'] - base['peak_mb'] > 1:
+            regressions.append(f'{name}: peak memory {base["peak_mb"]:.1f} -> {result["peak_mb"]:.1f} MB')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--stages', type=str, default='', help=f'comma separated: {",".join(stages)}')
+    parser.add_argument('--limit', type=int, default=None, help='number of corpus files')
+    parser.add_argument('--repeat', type=int, default=3, help='report the best of N runs')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--baseline', type=Path, default=baseline_file)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    args = parser.parse_args()
+
+    names = args.stages.split(',') if args.stages else list(stages)
+    if unknown := [name for name in names if name not in stages]:
+        parser.error(f'unknown stages: {",".join(unknown)}')
+
+    report = {}
+    if not args.json:
+        print(f'{"stage":22}{"items":>10}{"time":>10}{"items/s":>12}{"peak MB":>10}')
+    for name in names:
+        if not (run := stages[name](args)):
+            if not args.json:
+                print(f'{name:22}{"no fixtures":>10}')
+            continue
+        items, elapsed, peak = measure(run, args.repeat)
+        report[name] = {
+            'items': items,
+            'time': round(elapsed, 4),
+            'throughput': round(items / elapsed, 1) if elapsed else 0,
+            'peak_mb': round(peak / 1024 / 1024, 2),
+        }
+        if not args.json:
+            r = report[name]
+            print(f'{name:22}{items:>10}{elapsed:>9.3f}s{r["throughput"]:>12.0f}{r["peak_mb"]:>10.1f}')
+
+    if args.json:
+        print(json.dumps(report, indent=4))
+
+    if args.save_baseline:
+        baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+        baseline.update(report)
+        args.baseline.write_text(json.dumps(baseline, indent=4) + '\n')
+        print(f'Saved baseline: {args.baseline}')
+    elif args.baseline.exists():
+        if regressions := compare(report, json.loads(args.baseline.read_text()), args.tolerance):
+            print('Regressions:\n' + '\n'.join(f'  {i}' for i in regressions))
+            sys.exit(1)
+        print('No regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,8 @@
 import time
 import json
+import asyncio
 import requests
+import threading
 from pathlib import Path
 from Crypto.Cipher import AES
 from urllib.parse import urlparse, parse_qs
@@ -9,6 +11,26 @@ from playwright.sync_api import sync_playwright
 from utils import *
 
 
+FEISHU_BOT_RATE = 100 / 60      # 群机器人限速，100条/分钟
+FEISHU_BOT_BURST = 5            # 群机器人限速，5条/秒
+FEISHU_BITABLE_RATE = 10        # 多维表格写入限速，10次/秒
+FEISHU_BITABLE_BATCH = 100      # 多维表格每次写入的记录数，最多500
+FEISHU_CONCURRENCY = 5          # 同时进行的请求数
+FEISHU_MAX_RETRY = 5
+FEISHU_LIMIT_CODES = (9499, 11232, 11233, 99991400, 1254290, 1254291)  # 频率限制、写冲突，退避后重试
+FEISHU_TOKEN_CODES = (99991661, 99991663, 99991668)                    # token无效或过期，刷新后重试
+
+
+def get_feishu_code(result: dict, status: int):
+    """错误码，成功时为0，群机器人的响应中为StatusCode"""
+    return result.get('code', result.get('StatusCode'))
+
+
+async def feishu_post(url: str, headers: dict, data: dict, limiter: rateLimiter):
+    """返回(结果, 错误码)，成功时错误码为0，请求失败时结果为None"""
+    return await post_json(url, headers, data, limiter, get_feishu_code, FEISHU_LIMIT_CODES, FEISHU_MAX_RETRY)
+
+
 class feishuBot:
     """飞书群机器人
     https://open.feishu.cn/document/ukTMukTMukTM/ucTM5YjL3ETO24yNxkjN
@@ -18,6 +40,7 @@ class feishuBot:
 
     def __init__(self, key) -> None:
         self.key = key
+        self.limiter = rateLimiter(FEISHU_BOT_RATE, FEISHU_BOT_BURST)
 
     def make_card(self, paper: dict):
         keywords = ','.join(paper['keywords'])
@@ -168,6 +191,18 @@ class feishuBot:
             print(r.text)
             return False
 
+    async def send_async(self, paper: dict):
+        """异步发送，遵守群机器人的频率限制"""
+        url = f'{self.URL_API}/bot/v2/hook/{self.key}'
+        data = {'msg_type': 'interactive', 'card': self.make_card(paper)}
+
+        result, code = await feishu_post(url, {'Content-Type': 'application/json; charset=utf-8'}, data, self.limiter)
+        if code == 0:
+            console.print(f'发送成功 {paper["title"]}', style='bold green')
+            return True
+        console.print(f'发送失败 {paper["title"]}\n{result}', style='bold red')
+        return False
+
 
 class feishuOper:
     """服务端程序
@@ -200,6 +235,9 @@ class feishuOper:
         self.user_expire = float()
         self.user_refresh_expire = float()
 
+        self.bitable_limiter = rateLimiter(FEISHU_BITABLE_RATE, FEISHU_BITABLE_RATE)
+        self.token_lock = threading.Lock()
+
         # 缓存文件
         cache_path = Path(__file__).parent.absolute().joinpath('cache')
         cache_path.mkdir(exist_ok=True)
@@ -415,3 +453,33 @@ class feishuOper:
             console.print_exception()
 
         return False
+
+    def refresh_tenant_access(self, token: str) -> bool:
+        """token失效时刷新，多个请求同时失效只刷新一次"""
+        with self.token_lock:
+            if self.tenant_access_token != token:
+                return True
+            if self.get_tenant_access():
+                self.update_access_cache()
+                return True
+            return False
+
+    async def bitable_batch_create_async(self, table: str, data: dict) -> bool:
+        """异步写入，遵守多维表格的频率限制，token失效时自动刷新"""
+        app_token, table_id = table.split(':')
+        url = f'{self.URL_API}/bitable/v1/apps/{app_token}/tables/{table_id}/records/batch_create'
+        for _ in range(2):
+            token = self.tenant_access_token
+            headers = {
+                'Content-Type': 'application/json; charset=utf-8',
+                'Authorization': f'Bearer {token}',
+            }
+            result, code = await feishu_post(url, headers, data, self.bitable_limiter)
+            if code == 0:
+                console.print(f'写入表格成功 {len(data["records"])}', style='bold green')
+                return True
+            if code not in FEISHU_TOKEN_CODES or not await asyncio.to_thread(self.refresh_tenant_access, token):
+                break
+
+        console.print(f'写入表格失败: {result}', style='bold red')
+        return False
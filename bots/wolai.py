@@ -1,8 +1,27 @@
+import asyncio
 import requests
+import threading
 
 from utils import *
 
 
+WOLAI_RATE = 5                  # 请求限速，5次/秒
+WOLAI_BATCH = 20                # 每次最多创建20行
+WOLAI_CONCURRENCY = 2           # 同时进行的请求数
+WOLAI_MAX_RETRY = 5
+WOLAI_LIMIT_CODES = (429, 500, 502, 503, 504)   # 响应中的频率限制和服务端错误，退避后重试
+
+
+def get_wolai_status(result: dict, status: int):
+    """错误时响应中也有status_code"""
+    return result.get('status_code', status) if isinstance(result, dict) else status
+
+
+async def wolai_post(url: str, headers: dict, data: dict, limiter: rateLimiter):
+    """返回(结果, 状态码)，请求失败时结果为None"""
+    return await post_json(url, headers, data, limiter, get_wolai_status, WOLAI_LIMIT_CODES, WOLAI_MAX_RETRY)
+
+
 class wolaiOper:
     """我来应用
     https://www.wolai.com/wolai/7FB9PLeqZ1ni9FfD11WuUi
@@ -13,6 +32,8 @@ class wolaiOper:
         self.app_id = app_id
         self.app_secret = app_secret
         self.token = self.get_token()
+        self.limiter = rateLimiter(WOLAI_RATE, WOLAI_RATE)
+        self.token_lock = threading.Lock()
 
     def get_token(self) -> bool:
         """创建或重置token"""
@@ -55,3 +76,25 @@ class wolaiOper:
             console.print_exception()
 
         return False
+
+    def refresh_token(self, token: str) -> bool:
+        """token失效时重新获取，多个请求同时失效只获取一次"""
+        with self.token_lock:
+            if self.token == token:
+                self.token = self.get_token()
+            return bool(self.token)
+
+    async def database_post_async(self, id: str, data: dict) -> bool:
+        """异步创建数据表格数据，遵守限速，token失效时自动重新获取"""
+        url = f'{self.URL_API}/databases/{id}/rows'
+        for _ in range(2):
+            token = self.token
+            result, status = await wolai_post(url, {'Authorization': token}, data, self.limiter)
+            if status == 200:
+                console.print(f'写入表格成功 {len(data["rows"])}', style='bold green')
+                return True
+            if status != 401 or not await asyncio.to_thread(self.refresh_token, token):
+                break
+
+        console.print(f'写入表格失败: {result}', style='bold red')
+        return False
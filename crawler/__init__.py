@@ -1,4 +1,6 @@
 from .ccf import *
 from .dblp import *
+from .dblpxml import *
+from .journal import *
 from .scholar import *
 from .libpaper import *
@@ -1,234 +1,426 @@
 import json
 import time
 import asyncio
-import requests
+import hashlib
+import functools
+import itertools
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
 
 from utils import *
+from store import *
 from crawler.scholar import *
+from profiler import pool_initializer
 
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
 
-def get_dblp_data(url: str, start_year: str, end_year: str):
-    dblp_key = '/'.join(url.split('/')[-3:-1])
-    dblp_file = dblp_path.joinpath(f'{dblp_key.replace("/", "_")}.json')
+CRAWL_WORKERS = 20      # 同时处理的主页/目录页数量
+PARSE_PROCESSES = 0     # 解析网页的进程数，0表示在事件循环中解析
+TOC_PARSER = 'lxml'     # 目录页解析器：lxml/soup，lxml不可用或解析失败时使用soup
+ENRICH_INTERVAL = 7 * 24 * 3600     # 目录未变化时，缺少摘要的论文重新补充的间隔
 
-    old_data = json.loads(dblp_file.read_text()) if dblp_file.exists() else {}
-    all_data, new_data, update_data = get_dblp(dblp_key, old_data, start_year, end_year)
+crawl_stats = {'venues': 0, 'skipped_venues': 0, 'years': 0, 'skipped_years': 0, 'tocs': 0, 'skipped_tocs': 0}
 
-    # 只更新start_year到end_year的数据
-    for year, year_data in all_data.items():
-        old_data[year] = year_data
 
-    # 排序
-    for year, year_data in old_data.items():
-        for item in year_data:
-            item['papers'] = sorted(item['papers'], key=lambda x: x['url'])
-        old_data[year] = sorted(year_data, key=lambda x: x['dblp_url'])
+def get_dblp_key(url: str):
+    """会议/期刊地址转换为dblp key，如conf/ndss"""
+    return '/'.join(url.split('/')[-3:-1])
 
-    with open(dblp_file, 'w') as f:
-        json.dump(old_data, f, indent=4, ensure_ascii=False)
 
-    return url, all_data, new_data, update_data
+def load_dblp_data(dblp_key: str):
+    return get_store().load(dblp_key)
 
 
-def get_dblp(key: str, old_data: dict, start_year: str, end_year: str):
-    # 期刊/会议主页
-    url = f'https://dblp.uni-trier.de/db/{key}/index.html'
-    console.print(url, style='bold yellow')
-    while True:
-        try:
-            r = requests.get(url, timeout=30)
-            break
-        except Exception:
-            time.sleep(1)
-            print('Retrying...')
-
-    soup = BeautifulSoup(r.content, 'html.parser')
-    href_list = []
-    tasks = []
-    all_papers_dict = {}
-    new_papers_dict = {}
-    update_papers_dict = {}
-    loop = asyncio.new_event_loop()
-
-    old_dict = {}
-    for year_data in old_data.values():
-        for item in year_data:
-            for paper in item['papers']:
-                old_dict[paper['title']] = paper
-
-    # 遍历所有年份的所有文章
-    if '/journals/' in url:
-        try:
-            href_list = parse_journals_index(soup, start_year, end_year)
-        except Exception as e:
-            console.print(f'Parse Error: {url}\n{e}', style='bold red')
+def save_dblp_data(dblp_key: str, old_data: dict, all_data: dict, years: set=None):
+    """合并start_year到end_year的数据并写入存储，years为有变化的年份，默认全部"""
+    return get_store().save(dblp_key, old_data, all_data, years)
 
-        print(href_list)
-        for year, href in href_list:
-            task = asyncio.ensure_future(parse_journals(year, href, old_dict), loop=loop)
-            tasks.append(task)
 
-        console.print(f'tasks: {len(tasks)}\n', style='bold yellow')
+def get_manifest_file(dblp_key: str):
+    return manifest_path.joinpath(f'{dblp_key.replace("/", "_")}.json')
+
+
+def load_manifest(dblp_key: str):
+    """目录页清单：目录地址 -> 内容哈希、论文数、最近补充时间"""
+    manifest_file = get_manifest_file(dblp_key)
+    return json.loads(manifest_file.read_text()) if manifest_file.exists() else {}
+
+
+def save_manifest(dblp_key: str, manifest: dict):
+    with open(get_manifest_file(dblp_key), 'w') as f:
+        json.dump(manifest, f, indent=4, ensure_ascii=False, sort_keys=True)
+
+
+def get_digest(data) -> str:
+    if not isinstance(data, str):
+        data = json.dumps(data, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(data.encode()).hexdigest()
+
+
+def toc_unchanged(entry: dict, old_item: dict, field: str, digest: str):
+    """目录内容未变化，且论文数据完整或最近已尝试补充"""
+    if not entry or not old_item or entry.get(field) != digest:
+        return False
+    if all(paper.get('abstract') and paper.get('tldr') for paper in old_item['papers']):
+        return True
+    return time.time() - entry.get('enriched', 0) < ENRICH_INTERVAL
+
 
-    elif '/conf/' in url:
+def get_dblp_data(url: str, start_year: str, end_year: str):
+    """爬取单个会议/期刊"""
+    return asyncio.run(crawl_dblp([url], start_year, end_year))[0]
+
+
+async def crawl_dblp(urls: list, start_year: str, end_year: str, workers: int=CRAWL_WORKERS, processes: int=PARSE_PROCESSES,
+                     parser: str=TOC_PARSER, journal=None):
+    """异步爬取引擎
+    所有会议/期刊主页和目录页任务放入同一个队列，由固定数量的协程处理，
+    目录页任务优先，先完成已开始的会议/期刊，避免同时加载过多旧数据
+    journal为断点续爬日志，跳过日志中已完成的会议/期刊和目录页
+    """
+    queue = asyncio.PriorityQueue()
+    venues = {}
+    results = {}
+    executor = ProcessPoolExecutor(processes, **pool_initializer()) if processes else None
+    counter = itertools.count()
+
+    def put(priority: int, job: tuple):
+        queue.put_nowait((priority, next(counter), job))
+
+    def finish(key: str):
+        """会议/期刊的所有目录页完成后写入文件，没有变化的年份不排序，全部没有变化时不写入"""
+        venue = venues.pop(key)
+        all_data = venue['all']
+        # 失败的目录页保留旧数据
+        for year, href in venue['failed']:
+            if old_item := venue['old_items'].get(href):
+                all_data.setdefault(year, []).append(old_item)
+        # 按会议排序
+        for year in all_data:
+            all_data[year].sort(key=lambda x: x['dblp_url'])
+
+        touched = venue['touched']
+        crawl_stats['venues'] += 1
+        crawl_stats['years'] += len(all_data)
+        crawl_stats['skipped_years'] += len(all_data.keys() - touched)
+        if touched:
+            save_dblp_data(key, venue['old_data'], all_data, touched)
+        else:
+            crawl_stats['skipped_venues'] += 1
+        save_manifest(key, venue['manifest'])
+        results[venue['url']] = (venue['url'], all_data, venue['new'], venue['update'])
+        if journal:
+            journal.venue_done(key)
+
+    async def crawl_index(url: str):
+        key = get_dblp_key(url)
+        if journal and key in journal.venues:
+            console.print(f'Resume: {key} done', style='bold yellow')
+            # 上次中断前已写入存储，从存储和日志中恢复结果
+            all_data = {year: data for year, data in load_dblp_data(key).items() if start_year <= year <= end_year}
+            results[url] = (url, all_data, *journal.venue_delta(key))
+            return
+
+        index_url = f'https://dblp.uni-trier.de/db/{key}/index.html'
+        console.print(index_url, style='bold yellow')
+
+        # 期刊/会议主页
+        with timed('index_fetch'):
+            content = await fetch(index_url, ttl=cache_ttl())
+        if not content:
+            return
+
+        href_list = []
         try:
-            href_list = parse_conf_index(soup, start_year, end_year)
+            soup = BeautifulSoup(content, 'html.parser')
+            if '/journals/' in index_url:
+                href_list = parse_journals_index(soup, start_year, end_year)
+            elif '/conf/' in index_url:
+                href_list = parse_conf_index(soup, start_year, end_year)
         except Exception as e:
-            console.print(f'Parse Error: {url}\n{e}', style='bold red')
-
+            console.print(f'Parse Error: {index_url}\n{e}', style='bold red')
         print(href_list)
-        for year, href in href_list:
-            task = asyncio.ensure_future(parse_conf(year, href, old_dict), loop=loop)
-            tasks.append(task)
 
-        console.print(f'tasks: {len(tasks)}\n', style='bold yellow')
+        old_data = load_dblp_data(key)
+        old_items = {item['dblp_url']: item for year_data in old_data.values() for item in year_data}
+        venues[key] = {
+            'url': url,
+            'kind': 'journals' if '/journals/' in index_url else 'conf',
+            'old_data': old_data,
+            'old_items': old_items,
+            'old_dict': {paper['title']: paper for item in old_items.values() for paper in item['papers']},
+            'manifest': load_manifest(key),
+            'pending': len(href_list),
+            'all': {}, 'new': {}, 'update': {}, 'failed': [], 'touched': set(),
+        }
+        if journal:
+            # 上次中断前已补充的论文，新增/更新的标记在日志中，合并时仍计入增量
+            venues[key]['old_dict'].update(journal.papers.get(key, {}))
+        console.print(f'tasks: {len(href_list)}\n', style='bold yellow')
+
+        # 遍历所有年份的所有文章
+        for year, href in href_list:
+            put(0, ('toc', key, year, href))
+        if not href_list:
+            finish(key)
 
-    if tasks:
+    async def crawl_toc(key: str, year: str, href: str):
+        venue = venues[key]
+        parse_func = parse_journals if venue['kind'] == 'journals' else parse_conf
         try:
-            done, pending = loop.run_until_complete(asyncio.wait(tasks))
-            print(f'done: {len(done)}\t pending: {len(pending)}\n')
-            for task in done:
-                ret = task.result()
+            crawl_stats['tocs'] += 1
+            if journal and (key, href) in journal.tocs:
+                # 上次中断前已完成的目录页
+                ret, venue['manifest'][href] = journal.tocs[(key, href)]
+            else:
+                ret = await parse_func(year, href, venue['old_dict'], executor, parser,
+                                       venue['manifest'], venue['old_items'].get(href), journal)
+                if journal and isinstance(ret, tuple) and ret[2] is not None:
+                    journal.toc_done(key, href, ret, venue['manifest'].get(href))
+            if not isinstance(ret, tuple):
+                venue['failed'].append((year, href))
+            elif ret[2] is None:
+                # 目录未变化，直接使用旧数据
+                crawl_stats['skipped_tocs'] += 1
+                venue['all'].setdefault(year, []).append(ret[1])
+            else:
                 year, all_papers, new_papers, update_papers = ret
-
-                all_papers_dict.setdefault(year, []).append(all_papers)
-                new_papers_dict.setdefault(year, []).append(new_papers)
-                update_papers_dict.setdefault(year, []).append(update_papers)
-        except ValueError:
-            console.print(f'ValueError: {ret}', style='bold red')
-        except Exception:
-            console.print_exception()
+                venue['touched'].add(year)
+                venue['all'].setdefault(year, []).append(all_papers)
+                venue['new'].setdefault(year, []).append(new_papers)
+                venue['update'].setdefault(year, []).append(update_papers)
         finally:
-            loop.close()
-
-    # 按会议排序
-    for year in all_papers_dict:
-        all_papers_dict[year].sort(key=lambda x: x['dblp_url'])
-
-    return all_papers_dict, new_papers_dict, update_papers_dict
+            venue['pending'] -= 1
+            if venue['pending'] == 0:
+                finish(key)
 
+    async def worker():
+        while True:
+            _, _, job = await queue.get()
+            try:
+                if job[0] == 'index':
+                    await crawl_index(*job[1:])
+                else:
+                    await crawl_toc(*job[1:])
+            except Exception:
+                console.print_exception()
+            finally:
+                queue.task_done()
 
-async def parse_journals(year: str, url: str, old_dict: dict):
-    """获取一年的所有文章"""
-    # 获取网页数据
-    data = await fetch(url)
-    if not data:
-        return url
+    for url in urls:
+        put(1, ('index', url))
 
+    tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+    tasks.append(asyncio.create_task(monitor_loop_lag()))
     try:
-        soup = BeautifulSoup(data, 'html.parser')
+        await queue.join()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await close_client()
+        if executor:
+            executor.shutdown()
+
+    return [results[url] for url in urls if url in results]
+
+
+async def run_parser(func, data: str, executor=None):
+    """解析网页，可以放到进程池中执行"""
+    if executor:
+        return await asyncio.get_running_loop().run_in_executor(executor, func, data)
+    return func(data)
+
+
+def is_updated(paper: dict, abstract: str, tldr: str, new_flag: bool, update_flag: bool):
+    """已有论文补充了摘要或TLDR"""
+    return not new_flag and (update_flag or (not abstract and paper['abstract']) or (not tldr and paper['tldr']))
+
+
+async def merge_papers(papers: list, old_dict: dict, callback=None, new_titles=(), update_titles=()):
+    """用旧数据补充，缺少摘要的论文批量获取补充数据
+    callback(paper, new, update)在每篇论文补充完成时调用
+    new_titles/update_titles为上次中断前已补充的新增/更新论文，已在old_dict中，仍计入增量
+    """
+    all_papers = []
+    new_papers = []
+    update_papers = []
+    pending = {}
+    for paper in papers:
+        # 用旧数据补充
+        title = paper['title']
+        new_flag = title not in old_dict or title in new_titles
+        update_flag = title in update_titles
+        paper = old_dict.get(title, paper)
+
+        abstract = paper.setdefault('abstract', '')
+        tldr = paper.setdefault('tldr', '')
+        if not abstract or not tldr:
+            pending[id(paper)] = (paper, abstract, tldr, new_flag, update_flag)
+        elif is_updated(paper, abstract, tldr, new_flag, update_flag):
+            update_papers.append(paper)
+
+        all_papers.append(paper)
+        if new_flag:
+            new_papers.append(paper)
+
+    def done(paper: dict):
+        _, abstract, tldr, new_flag, update_flag = pending[id(paper)]
+        callback(paper, new_flag, is_updated(paper, abstract, tldr, new_flag, update_flag))
+
+    # 获取新数据补充
+    with timed('s2_enrich'):
+        await enrich_papers([i[0] for i in pending.values()], done if callback else None)
+    for paper, *flags in pending.values():
+        if is_updated(paper, *flags):
+            update_papers.append(paper)
+
+    return all_papers, new_papers, update_papers
+
+
+def has_class(*names):
+    """XPath条件，等价于CSS的.a.b"""
+    return ' and '.join(f'contains(concat(" ", normalize-space(@class), " "), " {name} ")' for name in names)
+
+
+def get_entry_lxml(entry):
+    """lxml解析一篇文章，结果与get_entry_soup一致"""
+    link = entry.xpath(f'((.//li[{has_class("drop-down")}])[1]//a)[1]')[0]
+    title = entry.xpath(f'(.//span[{has_class("title")}])[1]')[0]
+    names = entry.xpath('.//span[@itemprop="name"]')
+    return {
+        'url': link.get('href'),
+        'title': title.text_content().strip('.'),
+        'authors': ', '.join([a.text_content() for a in names[:-1]]),
+    }
+
+
+def get_entry_soup(entry):
+    return {
+        'url': entry.select_one('li.drop-down').select_one('a').attrs.get('href'),
+        'title': entry.select_one('span.title').text.strip('.'),
+        'authors': ', '.join([a.text for a in entry.select('span[itemprop="name"]')[:-1]]),
+    }
+
+
+def parse_toc_lxml(data: str, kind: str):
+    """lxml解析目录页，只提取需要的条目"""
+    if isinstance(data, str):
+        data = data.encode()
+    doc = lxml.html.document_fromstring(data, parser=lxml.html.HTMLParser(encoding='utf-8'))
+    title = doc.xpath('string((//h1)[1])')
+
+    if kind == 'journals':
+        head = {'journals_title': title}
+        entries = doc.xpath(f'//li[{has_class("entry", "article")}]')
+    else:
+        if '404' in title:
+            return {'conf_title': title}, None
+        editor = doc.xpath(f'(//li[{has_class("entry", "editor")}])[1]')[0]
+        conf_url = editor.xpath(f'((.//li[{has_class("drop-down")}])[1]//a)[1]')[0].get('href')
+        head = {'conf_title': title, 'conf_url': conf_url}
+        entries = doc.xpath(f'//li[{has_class("entry", "inproceedings")}]')
+
+    return head, [get_entry_lxml(entry) for entry in entries]
+
+
+def parse_toc_soup(data: str, kind: str):
+    """BeautifulSoup解析目录页"""
+    soup = BeautifulSoup(data, 'html.parser')
+    title = soup.select_one('h1').text
+
+    if kind == 'journals':
         # 期刊
-        journals_title = soup.select_one('h1').text
-
-        # 文章
-        all_papers = []
-        new_papers = []
-        update_papers = []
-        article = soup.select('li.entry.article')
-        for a in article:
-            new_flag = False
-            update_flag = False
-
-            paper = {'url': a.select_one('li.drop-down').select_one('a').attrs.get('href')}
-            paper['title'] = a.select_one('span.title').text.strip('.')
-            paper['authors'] = ', '.join([a.text for a in a.select('span[itemprop="name"]')[:-1]])
-
-            # 用旧数据补充
-            if paper['title'] in old_dict:
-                paper = old_dict[paper['title']]
-            else:
-                new_flag = True
-
-            # 获取新数据补充
-            abstract = paper.setdefault('abstract', '')
-            tldr = paper.setdefault('tldr', '')
-            if not abstract or not tldr:
-                new_paper = await get_scholar(paper)
-                if (not abstract and new_paper['abstract']) or (not tldr and new_paper['tldr']) and not new_flag:
-                    update_flag = True
-                paper = new_paper
-
-            all_papers.append(paper)
-            if new_flag:
-                new_papers.append(paper)
-            if update_flag:
-                update_papers.append(paper)
-
-            await asyncio.sleep(1)
-
-        result_all = {'dblp_url': url, 'journals_title': journals_title, 'papers': sorted(all_papers, key=lambda x: x['url'])}
-        result_new = {'dblp_url': url, 'journals_title': journals_title, 'papers': new_papers}
-        result_update = {'dblp_url': url, 'journals_title': journals_title, 'papers': update_papers}
-
-        print(f'{journals_title}\n{url}\nAll Papers: {len(all_papers)}\tNew Papers: {len(new_papers)}\tUpdate Papers: {len(update_papers)}\n')
-        return year, result_all, result_new, result_update
-    except Exception:
-        console.print(url, style='bold red')
-        console.print_exception()
-        return url
+        head = {'journals_title': title}
+        entries = soup.select('li.entry.article')
+    else:
+        # 会议
+        if '404' in title:
+            return {'conf_title': title}, None
+        editor = soup.select_one('li.entry.editor')
+        conf_url = editor.select_one('li.drop-down').select_one('a').attrs.get('href')
+        # conf_title = editor.select_one('span.title').text
+        head = {'conf_title': title, 'conf_url': conf_url}
+        entries = soup.select('li.entry.inproceedings')
+
+    # 文章
+    return head, [get_entry_soup(entry) for entry in entries]
+
+
+def parse_toc_page(data: str, kind: str, parser: str=TOC_PARSER):
+    """解析目录页，返回(目录信息, 文章列表)"""
+    if parser == 'lxml' and lxml:
+        try:
+            return parse_toc_lxml(data, kind)
+        except Exception as e:
+            console.print(f'lxml failed, fallback to soup: {e}', style='bold red')
+    return parse_toc_soup(data, kind)
 
 
-async def parse_conf(year: str, url: str, old_dict: dict):
-    """获取一年的所有文章"""
+def parse_journals_page(data: str, parser: str=TOC_PARSER):
+    """解析期刊目录页"""
+    return parse_toc_page(data, 'journals', parser)
+
+
+def parse_conf_page(data: str, parser: str=TOC_PARSER):
+    """解析会议目录页"""
+    return parse_toc_page(data, 'conf', parser)
+
+
+async def parse_toc(year: str, url: str, old_dict: dict, parse_func, executor=None, parser: str=TOC_PARSER,
+                    manifest: dict=None, old_item: dict=None, journal=None):
+    """获取一年的所有文章
+    manifest为目录页清单，网页或解析结果与清单一致时跳过，返回(year, old_item, None, None)
+    journal为断点续爬日志，记录补充完成的论文
+    """
     # 获取网页数据
-    data = await fetch(url)
+    with timed('toc_fetch'):
+        data = await fetch(url, ttl=cache_ttl(year))
     if not data:
         return url
 
     try:
-        soup = BeautifulSoup(data, 'html.parser')
-        # 会议
-        conf_title = soup.select_one('h1').text
-        if '404' in conf_title:
-            print(f'{conf_title}\n{url}\npapers: 0\n')
+        entry = (manifest or {}).get(url)
+        page_digest = get_digest(data)
+        if toc_unchanged(entry, old_item, 'hash', page_digest):
+            return year, old_item, None, None
+
+        with timed('toc_parse'):
+            head, papers = await run_parser(functools.partial(parse_func, parser=parser), data, executor)
+        title = head.get('journals_title') or head.get('conf_title')
+        if papers is None:
+            print(f'{title}\n{url}\npapers: 0\n')
             return url
 
-        editor = soup.select_one('li.entry.editor')
-        conf_url = editor.select_one('li.drop-down').select_one('a').attrs.get('href')
-        # conf_title = editor.select_one('span.title').text
-
-        # 文章
-        all_papers = []
-        new_papers = []
-        update_papers = []
-        inproceedings = soup.select('li.entry.inproceedings')
-        for i in inproceedings:
-            new_flag = False
-            update_flag = False
-
-            paper = {'url': i.select_one('li.drop-down').select_one('a').attrs.get('href')}
-            paper['title'] = i.select_one('span.title').text.strip('.')
-            paper['authors'] = ', '.join([a.text for a in i.select('span[itemprop="name"]')[:-1]])
-
-            # 用旧数据补充
-            if paper['title'] in old_dict:
-                paper = old_dict[paper['title']]
-            else:
-                new_flag = True
-
-            # 获取新数据补充
-            abstract = paper.setdefault('abstract', '')
-            tldr = paper.setdefault('tldr', '')
-            if not abstract or not tldr:
-                new_paper = await get_scholar(paper)
-                if (not abstract and new_paper['abstract']) or (not tldr and new_paper['tldr']) and not new_flag:
-                    update_flag = True
-                paper = new_paper
-
-            all_papers.append(paper)
-            if new_flag:
-                new_papers.append(paper)
-            if update_flag:
-                update_papers.append(paper)
-
-            await asyncio.sleep(1)
-
-        result_all = {'dblp_url': url, 'conf_title': conf_title, 'conf_url': conf_url, 'papers': sorted(all_papers, key=lambda x: x['url'])}
-        result_new = {'dblp_url': url, 'conf_title': conf_title, 'conf_url': conf_url, 'papers': new_papers}
-        result_update = {'dblp_url': url, 'conf_title': conf_title, 'conf_url': conf_url, 'papers': update_papers}
-
-        print(f'{conf_title}\n{url}\nAll Papers: {len(all_papers)}\tNew Papers: {len(new_papers)}\tUpdate Papers: {len(update_papers)}\n')
+        # 网页有变化（如页脚时间），但目录内容相同
+        entries_digest = get_digest([head, papers])
+        if toc_unchanged(entry, old_item, 'entries', entries_digest):
+            entry['hash'] = page_digest
+            return year, old_item, None, None
+
+        if journal:
+            key = get_dblp_key(url)
+            all_papers, new_papers, update_papers = await merge_papers(
+                papers, old_dict, functools.partial(journal.paper_done, key), journal.new.get(key, ()), journal.update.get(key, ()))
+        else:
+            all_papers, new_papers, update_papers = await merge_papers(papers, old_dict)
+        if manifest is not None:
+            manifest[url] = {
+                'year': year,
+                'hash': page_digest,
+                'entries': entries_digest,
+                'papers': len(all_papers),
+                'enriched': time.time(),
+            }
+
+        result_all = {'dblp_url': url, **head, 'papers': sorted(all_papers, key=lambda x: x['url'])}
+        result_new = {'dblp_url': url, **head, 'papers': new_papers}
+        result_update = {'dblp_url': url, **head, 'papers': update_papers}
+
+        print(f'{title}\n{url}\nAll Papers: {len(all_papers)}\tNew Papers: {len(new_papers)}\tUpdate Papers: {len(update_papers)}\n')
         return year, result_all, result_new, result_update
     except Exception:
         console.print(url, style='bold red')
@@ -236,6 +428,18 @@ async def parse_conf(year: str, url: str, old_dict: dict):
         return url
 
 
+async def parse_journals(year: str, url: str, old_dict: dict, executor=None, parser: str=TOC_PARSER,
+                         manifest: dict=None, old_item: dict=None, journal=None):
+    """获取一年的所有期刊文章"""
+    return await parse_toc(year, url, old_dict, parse_journals_page, executor, parser, manifest, old_item, journal)
+
+
+async def parse_conf(year: str, url: str, old_dict: dict, executor=None, parser: str=TOC_PARSER,
+                     manifest: dict=None, old_item: dict=None, journal=None):
+    """获取一年的所有会议文章"""
+    return await parse_toc(year, url, old_dict, parse_conf_page, executor, parser, manifest, old_item, journal)
+
+
 def parse_journals_index(soup, start_year: str, end_year: str):
     """解析期刊首页"""
     results = []
@@ -0,0 +1,170 @@
+import re
+import gzip
+import html.entities
+import xml.etree.ElementTree as ET
+
+from utils import *
+from crawler.dblp import *
+
+"""
+离线模式：从dblp XML数据导入论文
+https://dblp.org/xml/dblp.xml.gz
+"""
+
+DBLP_URL = 'https://dblp.uni-trier.de'
+RECORD_TAGS = {'article', 'inproceedings', 'proceedings'}
+CHUNK_SIZE = 1 << 20
+
+# dblp.xml使用DTD中定义的HTML实体，不加载DTD时需要手动提供
+ENTITIES = {name: chr(code) for name, code in html.entities.name2codepoint.items()}
+
+
+class recordBuilder(ET.TreeBuilder):
+    """只收集需要的记录，处理后立即清理，保持内存占用恒定"""
+
+    def __init__(self):
+        super().__init__()
+        self.root = None
+        self.records = []
+
+    def start(self, tag, attrs):
+        elem = super().start(tag, attrs)
+        if self.root is None:
+            self.root = elem
+        return elem
+
+    def end(self, tag):
+        elem = super().end(tag)
+        if tag in RECORD_TAGS:
+            self.records.append(elem)
+        return elem
+
+    def pop(self):
+        records, self.records = self.records, []
+        for elem in records:
+            yield elem
+            elem.clear()
+        if self.root is not None:
+            self.root.clear()
+
+
+def iter_dblp_xml(file: str):
+    """流式解析dblp.xml(.gz)"""
+    builder = recordBuilder()
+    parser = ET.XMLParser(target=builder)
+    parser.entity.update(ENTITIES)
+
+    opener = gzip.open if str(file).endswith('.gz') else open
+    with opener(file, 'rb') as f:
+        while chunk := f.read(CHUNK_SIZE):
+            parser.feed(chunk)
+            yield from builder.pop()
+        parser.close()
+        yield from builder.pop()
+
+
+def get_text(elem):
+    return ''.join(elem.itertext()).strip() if elem is not None else ''
+
+
+def parse_record(elem):
+    """解析一条记录，返回(dblp key, 目录地址)"""
+    url = elem.findtext('url') or ''
+    toc = url.split('#')[0]
+    parts = toc.split('/')
+    if len(parts) < 4 or parts[0] != 'db':
+        return None, None
+    return '/'.join(parts[1:3]), f'{DBLP_URL}/{toc}'
+
+
+def get_dblp_xml_data(file: str, urls: list, start_year: str, end_year: str, ccf_data: dict=None):
+    """从dblp.xml中导入指定会议/期刊，生成与get_dblp_data相同的数据"""
+    console.print(f'Parsing {file}...', style='bold yellow')
+
+    keys = {get_dblp_key(url): url for url in urls}
+    names = {}
+    if ccf_data:
+        for field in ccf_data.values():
+            for ccf_type in field.values():
+                for rank in ccf_type.values():
+                    names.update({get_dblp_key(i['address']): i['full_name'] for i in rank})
+
+    tocs = {}           # 目录地址 -> 目录信息
+    proceedings = {}    # 目录地址 -> (会议标题, 会议网址)
+    records = 0
+    for elem in iter_dblp_xml(file):
+        records += 1
+        key, toc = parse_record(elem)
+        if key not in keys:
+            continue
+
+        if elem.tag == 'proceedings':
+            proceedings[toc] = (get_text(elem.find('title')), elem.findtext('ee') or '')
+            continue
+
+        year = elem.findtext('year') or ''
+        if not (year and end_year >= year >= start_year):
+            continue
+
+        if toc not in tocs:
+            if elem.tag == 'article':
+                volume = elem.findtext('volume')
+                title = f'{names.get(key) or elem.findtext("journal")}, Volume {volume}' if volume else names.get(key, '')
+            else:
+                title = ''
+            tocs[toc] = {'key': key, 'year': year, 'type': elem.tag, 'title': title, 'papers': []}
+
+        tocs[toc]['papers'].append({
+            'url': elem.findtext('ee') or '',
+            'title': get_text(elem.find('title')).strip('.'),
+            # 去掉同名作者的编号，如'Wei Wang 0001'
+            'authors': ', '.join(re.sub(r' \d{4}$', '', get_text(a)) for a in elem.findall('author')),
+        })
+
+    console.print(f'records: {records}\ttocs: {len(tocs)}\n', style='bold yellow')
+
+    results = []
+    for key, url in keys.items():
+        old_data = load_dblp_data(key)
+        old_items = {item['dblp_url']: item for year_data in old_data.values() for item in year_data}
+        old_dict = {paper['title']: paper for item in old_items.values() for paper in item['papers']}
+
+        all_data, new_data, update_data = {}, {}, {}
+        for toc, info in tocs.items():
+            if info['key'] != key:
+                continue
+
+            old_item = old_items.get(toc, {})
+            if info['type'] == 'article':
+                head = {'dblp_url': toc, 'journals_title': old_item.get('journals_title') or info['title']}
+            else:
+                conf_title, conf_url = proceedings.get(toc, ('', ''))
+                head = {
+                    'dblp_url': toc,
+                    'conf_title': old_item.get('conf_title') or conf_title,
+                    'conf_url': old_item.get('conf_url') or conf_url,
+                }
+
+            all_papers = []
+            new_papers = []
+            for paper in info['papers']:
+                # 用旧数据补充
+                if paper['title'] in old_dict:
+                    paper = old_dict[paper['title']]
+                else:
+                    paper.update({
+                        'abstract': '', 'tldr': '', 'files': {'openAccessPdf': ''},
+                        'title_zh': '', 'abstract_zh': '', 'tldr_zh': '',
+                    })
+                    new_papers.append(paper)
+                all_papers.append(paper)
+
+            year = info['year']
+            all_data.setdefault(year, []).append({**head, 'papers': all_papers})
+            new_data.setdefault(year, []).append({**head, 'papers': new_papers})
+            update_data.setdefault(year, []).append({**head, 'papers': []})
+
+        save_dblp_data(key, old_data, all_data)
+        results.append((url, all_data, new_data, update_data))
+
+    return results
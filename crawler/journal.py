@@ -0,0 +1,86 @@
+import json
+
+from utils import *
+
+journal_file = cache_path.joinpath('journal.jsonl')
+
+
+class crawlJournal:
+    """断点续爬日志
+    追加记录已完成的目录页、已补充的论文和已写入的会议/期刊，
+    --resume时回放日志，只继续未完成的部分，--fresh时丢弃上次中断的日志
+    """
+
+    def __init__(self, file=journal_file, resume: bool=False, fresh: bool=False):
+        self.file = file
+        self.tocs = {}      # (dblp key, 目录地址) -> (结果, 清单)
+        self.papers = {}    # dblp key -> {标题: 论文}
+        self.new = {}       # dblp key -> {新增论文的标题}
+        self.update = {}    # dblp key -> {更新论文的标题}
+        self.venues = set()
+
+        # 上次中断的日志，不能直接覆盖
+        if not resume and not fresh and self.file.exists() and self.file.stat().st_size:
+            console.print(f'Checkpoint journal exists: {self.file}\n'
+                          'Use --resume to continue the interrupted crawl or --fresh to discard it', style='bold red')
+            exit(1)
+
+        if resume and self.file.exists():
+            self.replay()
+            console.print(f'Resume: venues {len(self.venues)}\ttocs {len(self.tocs)}\t'
+                          f'papers {sum(len(i) for i in self.papers.values())}', style='bold yellow')
+        self.f = open(self.file, 'a' if resume else 'w', encoding='utf-8')
+
+    def replay(self):
+        with open(self.file, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break   # 中断时写了一半的记录
+
+                key = record['venue']
+                if record['type'] == 'toc':
+                    self.tocs[(key, record['url'])] = (tuple(record['result']), record['manifest'])
+                elif record['type'] == 'paper':
+                    paper = record['paper']
+                    self.papers.setdefault(key, {})[paper['title']] = paper
+                    # 同一篇论文可能记录多次，以最后一次为准
+                    for flag, titles in (('new', self.new), ('update', self.update)):
+                        if record.get(flag):
+                            titles.setdefault(key, set()).add(paper['title'])
+                        else:
+                            titles.get(key, set()).discard(paper['title'])
+                elif record['type'] == 'venue':
+                    self.venues.add(key)
+
+    def write(self, record: dict):
+        self.f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.f.flush()
+
+    def paper_done(self, key: str, paper: dict, new: bool=False, update: bool=False):
+        """new/update表示论文为新增/更新，恢复后仍计入增量"""
+        self.write({'type': 'paper', 'venue': key, 'paper': paper, 'new': new, 'update': update})
+
+    def toc_done(self, key: str, url: str, result: tuple, manifest: dict):
+        self.write({'type': 'toc', 'venue': key, 'url': url, 'result': result, 'manifest': manifest})
+
+    def venue_done(self, key: str):
+        self.write({'type': 'venue', 'venue': key})
+
+    def venue_delta(self, key: str):
+        """已完成的会议/期刊的新增和更新论文，从日志中的目录页结果恢复"""
+        new_data = {}
+        update_data = {}
+        for (venue, _), (result, _) in self.tocs.items():
+            if venue == key:
+                year, _, result_new, result_update = result
+                new_data.setdefault(year, []).append(result_new)
+                update_data.setdefault(year, []).append(result_update)
+        return new_data, update_data
+
+    def close(self, remove: bool=False):
+        """remove为True表示爬取已全部完成，删除日志"""
+        self.f.close()
+        if remove:
+            self.file.unlink(missing_ok=True)
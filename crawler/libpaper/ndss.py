@@ -1,21 +1,17 @@
 import re
-import json
 import asyncio
 from bs4 import BeautifulSoup
 
 from utils import *
+from store import *
 from .common import *
 
 
 def get_ndss_data(data: dict, update: bool=False):
-    data_file = paper_path.joinpath('conf_ndss.json')
-
-    if update or not data_file.exists():
+    ret_data = None if update else read_data(paper_path, 'conf_ndss')
+    if ret_data is None:
         ret_data = data_ndss(data)
-        with open(data_file, 'w') as f:
-            json.dump(ret_data, f, indent=4, ensure_ascii=False)
-    else:
-        ret_data = json.loads(data_file.read_text())
+        write_data(paper_path, 'conf_ndss', ret_data)
 
     num = sum(len(j['papers']) for i in ret_data.values() for j in i)
     console.print(f'NDSS: {num}\n', style='bold green')
@@ -53,7 +49,7 @@ def data_ndss(data: dict):
             if tasks:
                 i['papers'] = []    # 清空原数据
                 try:
-                    done, pending = loop.run_until_complete(asyncio.wait(tasks))
+                    done, pending = run_tasks(loop, tasks)
                     print(f'done: {len(done)}\t pending: {len(pending)}\n')
                     for task in done:
                         i['papers'].append(task.result())
@@ -1,22 +1,18 @@
 import re
-import json
 import asyncio
 import bibtexparser
 from bs4 import BeautifulSoup
 
 from utils import *
+from store import *
 from .common import *
 
 
 def get_usenix_data(data: dict, update: bool=False):
-    data_file = paper_path.joinpath('conf_uss.json')
-
-    if update or not data_file.exists():
+    ret_data = None if update else read_data(paper_path, 'conf_uss')
+    if ret_data is None:
         ret_data = get_usenix(data)
-        with open(data_file, 'w') as f:
-            json.dump(ret_data, f, indent=4, ensure_ascii=False)
-    else:
-        ret_data = json.loads(data_file.read_text())
+        write_data(paper_path, 'conf_uss', ret_data)
 
     num = sum(len(j['papers']) for i in ret_data.values() for j in i)
     console.print(f'USENIX: {num}\n', style='bold green')
@@ -52,7 +48,7 @@ def get_usenix(data: dict):
             if tasks:
                 i['papers'] = []    # 清空原数据
                 try:
-                    done, pending = loop.run_until_complete(asyncio.wait(tasks))
+                    done, pending = run_tasks(loop, tasks)
                     print(f'done: {len(done)}\t pending: {len(pending)}\n')
                     for task in done:
                         i['papers'].append(task.result())
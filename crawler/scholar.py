@@ -1,5 +1,8 @@
 import os
+import re
 import json
+import asyncio
+import functools
 import contextlib
 from semanticscholar import SemanticScholar
 from scholarly import scholarly, ProxyGenerator, MaxTriesExceededException
@@ -12,27 +15,46 @@ from utils import *
 # scholarly.use_proxy(pg, pg)
 
 
-async def get_scholar(paper: dict):
-    """获取补充数据"""
+S2_HOST = 'api.semanticscholar.org'
+S2_API = f'https://{S2_HOST}/graph/v1'
+S2_FIELDS = 'abstract,tldr,openAccessPdf'
+S2_BATCH_SIZE = 500     # 批量查询每次最多500个
+
+
+async def enrich_papers(papers: list, callback=None):
+    """批量获取补充数据，批量查询不到的再按标题搜索，callback在每篇论文完成时调用"""
+    async def enrich(paper: dict, ret: dict):
+        paper = await get_scholar(paper, ret)
+        if callback:
+            callback(paper)
+        return paper
+
+    ids = [get_paper_id(paper) for paper in papers]
+    found = await get_semantic_scholar_batch([i for i in ids if i])
+    tasks = [enrich(paper, found.get(i)) for paper, i in zip(papers, ids)]
+    return await asyncio.gather(*tasks)
+
+
+async def get_scholar(paper: dict, ret: dict=None):
+    """获取补充数据，ret为批量查询的结果"""
     paper.setdefault('files', {'openAccessPdf': ''})
 
-    if ret := await get_semantic_scholar(paper['title']):
+    if ret or (ret := await get_semantic_scholar(paper['title'])):
         paper['abstract'] = ret['abstract']
         paper['tldr'] = ret['tldr']
         paper['files']['openAccessPdf'] = ret['openAccessPdf']
-    elif ret := get_semantic_scholar2(paper['title']):
+    elif ret := await run_blocking(get_semantic_scholar2, paper['title']):
         paper['abstract'] = ret['abstract']
         paper['tldr'] = ret['tldr']
         paper['files']['openAccessPdf'] = ret['openAccessPdf']
-    elif ret := get_google_scholar(paper['title']):
+    elif ret := await run_blocking(get_google_scholar, paper['title']):
         paper['abstract'] = ret['abstract']
 
-    if not paper.get('title_zh'):
-        paper['title_zh'] = get_translate(paper['title'])
-    if not paper.get('abstract_zh'):
-        paper['abstract_zh'] = get_translate(paper['abstract'])
-    if not paper.get('tldr_zh'):
-        paper['tldr_zh'] = get_translate(paper['tldr'])
+    # 同步的翻译放到线程池中并行执行
+    fields = [field for field in ('title', 'abstract', 'tldr') if not paper.get(f'{field}_zh')]
+    results = await asyncio.gather(*[run_blocking(get_translate, paper[field]) for field in fields])
+    for field, result in zip(fields, results):
+        paper[f'{field}_zh'] = result
 
     if not paper['abstract'] and not paper['tldr']:
         console.print(f'Abstract null: {paper["title"]}', style='bold red')
@@ -40,40 +62,93 @@ async def get_scholar(paper: dict):
     return paper
 
 
+@functools.lru_cache
+def get_s2_client():
+    """复用同一个客户端"""
+    return SemanticScholar(api_key=os.getenv('S2API_KEY'))
+
+
+@functools.lru_cache
+def init_s2_limit():
+    """按是否有KEY设置限速，配置文件中已有的优先
+    无KEY：5000次/5分钟；有KEY：100次/秒
+    """
+    if os.getenv('S2API_KEY'):
+        set_host_limit(S2_HOST, rate=100, burst=10, concurrency=20)
+    else:
+        set_host_limit(S2_HOST, rate=5000 / 300, burst=1, concurrency=5)
+
+
+def get_s2_headers():
+    if key := os.getenv('S2API_KEY'):
+        return {'x-api-key': key}
+    return {}
+
+
+def get_paper_id(paper: dict):
+    """从论文网址中提取Semantic Scholar支持的ID"""
+    url = paper.get('url') or ''
+    if 'doi.org/' in url or 'dl.acm.org/doi/' in url:
+        if m := re.search(r'(10\.\d{4,9}/[^\s?#]+)', url):
+            return f'DOI:{m[1]}'
+    if m := re.search(r'arxiv\.org/(?:abs|pdf)/(\d{4}\.\d{4,5})', url):
+        return f'ARXIV:{m[1]}'
+    return None
+
+
+def format_semantic_scholar(ret: dict):
+    return {
+        'abstract': ret.get('abstract') or '',
+        'tldr': (ret.get('tldr') or {}).get('text') or '',
+        'openAccessPdf': (ret.get('openAccessPdf') or {}).get('url') or ''
+    }
+
+
+async def get_semantic_scholar_batch(ids: list):
+    """https://api.semanticscholar.org/api-docs/graph#tag/Paper-Data/operation/post_graph_get_papers
+    批量获取Semantic Scholar数据
+    """
+    init_s2_limit()
+    results = {}
+    for i in range(0, len(ids), S2_BATCH_SIZE):
+        chunk = ids[i:i+S2_BATCH_SIZE]
+        with contextlib.suppress(Exception):
+            ret_text = await fetch(f'{S2_API}/paper/batch', headers=get_s2_headers(), params={'fields': S2_FIELDS},
+                                   method='POST', data={'ids': chunk})
+            for paper_id, ret in zip(chunk, json.loads(ret_text)):
+                if ret and (ret := format_semantic_scholar(ret)) and (ret['abstract'] or ret['tldr']):
+                    results[paper_id] = ret
+
+    return results
+
+
 async def get_semantic_scholar(title: str):
     """https://api.semanticscholar.org/api-docs/graph
     使用API获取Semantic Scholar数据
-    无KEY：5000次/5分钟；有KEY：100次/秒
     """
-    semantic_url = 'https://api.semanticscholar.org/graph/v1/paper/search'
+    semantic_url = f'{S2_API}/paper/search'
 
     bad_character = ['(', ')', '/', '-', ':']
     for c in bad_character:
         title = title.replace(c, ' ')
 
-    headers = {
-        'x-api-key': os.getenv('S2API_KEY'),
-    }
     params = {
         'query': title,
-        'fields': 'abstract,tldr,openAccessPdf',
+        'fields': S2_FIELDS,
         'limit': 1
     }
+    init_s2_limit()
     with contextlib.suppress(Exception):
-        ret_text = await fetch(semantic_url, headers=headers, params=params)
+        ret_text = await fetch(semantic_url, headers=get_s2_headers(), params=params)
         ret = json.loads(ret_text)['data'][0]
-        return {
-            'abstract': ret['abstract'] or '',
-            'tldr': ret['tldr']['text'] or '',
-            'openAccessPdf': ret['openAccessPdf']['url'] if ret['openAccessPdf'] else ''
-        }
+        return format_semantic_scholar(ret)
 
     return {}
 
 
 def get_semantic_scholar2(title: str):
-    """使用第三方库获取Semantic Scholar数据"""
-    sch = SemanticScholar(api_key=os.getenv('S2API_KEY'))
+    """使用第三方库获取Semantic Scholar数据，同步调用，需在线程池中执行"""
+    sch = get_s2_client()
 
     bad_character = ['(', ')', '/', '-', ':']
     for c in bad_character:
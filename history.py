@@ -0,0 +1,140 @@
+import re
+import json
+import time
+import argparse
+
+from utils import *
+from store import get_title_hash
+
+"""
+推送记录：每个推送目标（如feishu_bot_vehicle）一个只追加写入的JSONL文件
+以论文的DOI或网址加标题hash为键，同一篇论文以最后一条记录的状态为准：sent/failed/pending
+旧的txt记录（每行一个标题）在首次使用时导入，以标题hash为键
+"""
+
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+STATUS_PENDING = 'pending'
+HISTORY_COMPACT_RATIO = 4   # 记录行数超过论文数的倍数时压缩文件
+
+
+def get_paper_key(paper: dict):
+    """论文的稳定id：DOI > 网址 > 标题hash，只与论文本身有关
+    多篇论文可能共用同一个网址（如整期的DOI），所以DOI和网址都加上标题hash
+    """
+    title_hash = get_title_hash(paper['title'])
+    url = (paper.get('url') or '').strip()
+    if ('doi.org/' in url or 'dl.acm.org/doi/' in url) and (m := re.search(r'(10\.\d{4,9}/[^\s?#]+)', url)):
+        return f'doi:{m[1].lower()}#{title_hash}'
+    if url:
+        return f'url:{url}#{title_hash}'
+    return f'title:{title_hash}'
+
+
+def get_legacy_keys(paper: dict):
+    """旧版本的id：不共用网址时没有标题hash，从txt导入的记录只有标题hash"""
+    key = get_paper_key(paper)
+    return [key.rsplit('#', 1)[0]] if '#' in key else []
+
+
+def get_paper_keys(papers: list):
+    """批量获取论文id"""
+    return [get_paper_key(paper) for paper in papers]
+
+
+class deliveryHistory:
+    """单个推送目标的推送记录，内存中保存{论文id: 状态}，每次推送后追加写入"""
+
+    def __init__(self, name: str, path: Path=history_path):
+        self.name = name
+        self.file = path.joinpath(f'{name}.jsonl')
+        self.status = {}
+        self.lines = 0
+
+        legacy_file = path.joinpath(f'{name}.txt')
+        if not self.file.exists() and legacy_file.exists():
+            self.migrate(legacy_file)
+
+        self.load()
+        if self.lines > HISTORY_COMPACT_RATIO * max(len(self.status), 1):
+            self.compact()
+        self.f = open(self.file, 'a')
+
+    def load(self):
+        if not self.file.exists():
+            return
+        with open(self.file) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 写入中断的最后一行
+                    console.print(f'{self.file.name}: skip broken line {self.lines + 1}', style='bold red')
+                    continue
+                self.status[record['key']] = record['status']
+                self.lines += 1
+
+    def migrate(self, legacy_file: Path):
+        """导入旧的txt记录"""
+        titles = [i for i in legacy_file.read_text().splitlines() if i.strip()]
+        with open(self.file, 'w') as f:
+            for title in dict.fromkeys(titles):
+                f.write(json.dumps({'key': get_paper_key({'title': title}), 'status': STATUS_SENT, 'title': title},
+                                   ensure_ascii=False) + '\n')
+        console.print(f'Migrated {legacy_file.name}: {len(titles)}', style='bold yellow')
+
+    def compact(self):
+        """只保留每篇论文的最后状态"""
+        temp_file = self.file.with_name(f'{self.file.name}.tmp')
+        with open(temp_file, 'w') as f:
+            for key, status in self.status.items():
+                f.write(json.dumps({'key': key, 'status': status}, ensure_ascii=False) + '\n')
+        temp_file.replace(self.file)
+        self.lines = len(self.status)
+
+    def get(self, paper: dict, key: str=None):
+        """论文状态，没有记录时返回None，兼容旧版本的id和从txt导入的标题记录"""
+        key = key or get_paper_key(paper)
+        if status := self.status.get(key):
+            return status
+        for legacy_key in get_legacy_keys(paper) + [get_paper_key({'title': paper['title']})]:
+            if status := self.status.get(legacy_key):
+                return status
+        return None
+
+    def is_sent(self, paper: dict, key: str=None):
+        return self.get(paper, key) == STATUS_SENT
+
+    def record(self, items: list, status: str):
+        """items为[(论文id, 论文)]，一次写入并刷新到磁盘"""
+        now = int(time.time())
+        lines = []
+        for key, paper in items:
+            self.status[key] = status
+            lines.append(json.dumps({'key': key, 'status': status, 'title': paper['title'], 'time': now}, ensure_ascii=False))
+        if lines:
+            self.f.write('\n'.join(lines) + '\n')
+            self.f.flush()
+            self.lines += len(lines)
+
+    def stats(self):
+        counts = {}
+        for status in self.status.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def close(self):
+        self.f.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='delivery history')
+    parser.add_argument('command', choices=['migrate', 'stats'], help='migrate: import txt history files; stats: count by status')
+    args = parser.parse_args()
+
+    names = {i.stem for i in history_path.glob('*.txt')} if args.command == 'migrate' else set()
+    names |= {i.stem for i in history_path.glob('*.jsonl')}
+    for name in sorted(names):
+        history = deliveryHistory(name)
+        console.print(f'{name}: {history.stats()}', style='bold green')
+        history.close()
@@ -0,0 +1,355 @@
+import re
+import json
+import sqlite3
+from array import array
+
+from utils import *
+from store import *
+
+"""
+论文倒排索引：词 -> 论文id列表，按会议/期刊增量更新
+每篇论文同时保存会议/期刊、年份和CCF等级/领域/类型，用于筛选
+另有FTS5全文索引（trigram分词，支持中文），覆盖标题、摘要、总结及其翻译，按相关度排序
+
+查询语法：
+    CAN bus             两个词都出现
+    "CAN bus"           短语，与关键词过滤规则相同：\\bCAN bus(?!\\w)
+    CAN OR LIN          任意一个出现
+    CAN NOT bus         出现CAN且没有出现bus
+    (CAN OR LIN) attack 括号
+"""
+
+index_file = cache_path.joinpath('index.db')
+INDEX_VERSION = 2       # 表结构变化时重建索引
+INDEX_SYNC = True       # 爬取和翻译后更新索引
+TOKEN_RE = re.compile(r'\w+')
+TEXT_FIELDS = ('title', 'abstract', 'tldr')
+ZH_FIELDS = ('title_zh', 'abstract_zh', 'tldr_zh')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS doc (
+    id INTEGER PRIMARY KEY,
+    venue TEXT NOT NULL,
+    year TEXT NOT NULL,
+    name TEXT NOT NULL,
+    rank TEXT NOT NULL,
+    field TEXT NOT NULL,
+    type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    abstract TEXT NOT NULL,
+    tldr TEXT NOT NULL,
+    title_zh TEXT NOT NULL,
+    abstract_zh TEXT NOT NULL,
+    tldr_zh TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS doc_venue ON doc (venue);
+CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5 (
+    title, abstract, tldr, title_zh, abstract_zh, tldr_zh,
+    content='doc', content_rowid='id', tokenize='trigram'
+);
+CREATE TABLE IF NOT EXISTS posting (
+    term TEXT NOT NULL,
+    venue TEXT NOT NULL,
+    ids BLOB NOT NULL,
+    PRIMARY KEY (term, venue)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS venue (
+    venue TEXT PRIMARY KEY,
+    version TEXT NOT NULL
+);
+'''
+
+
+def get_tokens(text: str):
+    return TOKEN_RE.findall(text.lower())
+
+
+def get_ccf_facets():
+    """dblp key -> CCF简称、等级、领域、类型"""
+    facets = {}
+    ccf_file = data_path.joinpath('ccf.json')
+    if not ccf_file.exists():
+        return facets
+
+    for field, field_data in json.loads(ccf_file.read_text()).items():
+        for ccf_type, type_data in field_data.items():
+            for rank, items in type_data.items():
+                for item in items:
+                    key = '/'.join(item['address'].split('/')[-3:-1])
+                    facets[key] = {'name': item['name'], 'rank': rank, 'field': field, 'type': ccf_type}
+    return facets
+
+
+def parse_query(query: str):
+    """解析查询语句，返回语法树：('term', 文本) / ('and'|'or', 左, 右) / ('not', 子树)"""
+    tokens = re.findall(r'"[^"]*"|\(|\)|[^\s()"]+', query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def parse_or():
+        node = parse_and()
+        while peek() == 'OR':
+            take()
+            node = ('or', node, parse_and())
+        return node
+
+    def parse_and():
+        node = parse_not()
+        while peek() not in (None, 'OR', ')'):
+            if peek() == 'AND':
+                take()
+            node = ('and', node, parse_not())
+        return node
+
+    def parse_not():
+        if peek() == 'NOT':
+            take()
+            return ('not', parse_not())
+        return parse_atom()
+
+    def parse_atom():
+        token = peek()
+        if token is None or token == ')':
+            raise ValueError(f'Unexpected end of query: {query}')
+        take()
+        if token == '(':
+            node = parse_or()
+            if peek() != ')':
+                raise ValueError(f'Missing ")": {query}')
+            take()
+            return node
+        return ('term', token.strip('"'))
+
+    node = parse_or()
+    if pos != len(tokens):
+        raise ValueError(f'Unexpected "{tokens[pos]}": {query}')
+    return node
+
+
+class paperIndex:
+    """SQLite保存的倒排索引，每个会议/期刊的数据变化后重新索引该会议/期刊"""
+
+    def __init__(self, file=index_file):
+        self.conn = sqlite3.connect(file, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        if self.conn.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+            self.conn.executescript('DROP TABLE IF EXISTS fts; DROP TABLE IF EXISTS doc; '
+                                    'DROP TABLE IF EXISTS posting; DROP TABLE IF EXISTS venue;')
+            self.conn.execute(f'PRAGMA user_version={INDEX_VERSION}')
+        self.conn.executescript(SCHEMA)
+
+    def update(self, store=None, rebuild: bool=False):
+        """增量更新，返回重新索引的会议/期刊数量"""
+        store = store or get_store()
+        facets = get_ccf_facets()
+        versions = dict(self.conn.execute('SELECT venue, version FROM venue'))
+        keys = store.keys()
+
+        updated = 0
+        with self.conn:
+            # 已删除的会议/期刊
+            for key in versions.keys() - set(keys):
+                self.remove(key)
+            for key in keys:
+                version = store.version(key)
+                if not rebuild and versions.get(key) == version:
+                    continue
+                self.remove(key)
+                self.add(key, store.load(key), facets.get(key, {}))
+                self.conn.execute('INSERT OR REPLACE INTO venue (venue, version) VALUES (?, ?)', (key, version))
+                updated += 1
+        return updated
+
+    def remove(self, dblp_key: str):
+        # 外部内容的FTS表需要用原内容删除
+        columns = ', '.join(TEXT_FIELDS + ZH_FIELDS)
+        self.conn.execute(f"INSERT INTO fts (fts, rowid, {columns}) SELECT 'delete', id, {columns} FROM doc WHERE venue = ?",
+                          (dblp_key,))
+        self.conn.execute('DELETE FROM doc WHERE venue = ?', (dblp_key,))
+        self.conn.execute('DELETE FROM posting WHERE venue = ?', (dblp_key,))
+        self.conn.execute('DELETE FROM venue WHERE venue = ?', (dblp_key,))
+
+    def add(self, dblp_key: str, data: dict, facet: dict):
+        postings = {}
+        for year, year_data in data.items():
+            for item in year_data:
+                head = {
+                    'year': year,
+                    'dblp_url': item['dblp_url'],
+                    'conf_title': item.get('journals_title') or item.get('conf_title') or '',
+                    'conf_url': item.get('journals_url') or item.get('conf_url') or '',
+                }
+                for paper in item['papers']:
+                    texts = [paper.get(field) or '' for field in TEXT_FIELDS + ZH_FIELDS]
+                    cursor = self.conn.execute(
+                        'INSERT INTO doc (venue, year, name, rank, field, type, title, abstract, tldr, title_zh, abstract_zh, tldr_zh, data) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                        (dblp_key, year, facet.get('name', ''), facet.get('rank', ''), facet.get('field', ''),
+                         facet.get('type', ''), *texts, json.dumps({**paper, **head}, ensure_ascii=False))
+                    )
+                    self.conn.execute('INSERT INTO fts (rowid, title, abstract, tldr, title_zh, abstract_zh, tldr_zh) '
+                                      'VALUES (?, ?, ?, ?, ?, ?, ?)', (cursor.lastrowid, *texts))
+                    for term in set(get_tokens(get_paper_text(paper))):
+                        postings.setdefault(term, array('I')).append(cursor.lastrowid)
+
+        self.conn.executemany(
+            'INSERT INTO posting (term, venue, ids) VALUES (?, ?, ?)',
+            [(term, dblp_key, ids.tobytes()) for term, ids in postings.items()]
+        )
+
+    def get_postings(self, term: str):
+        ids = set()
+        for (blob,) in self.conn.execute('SELECT ids FROM posting WHERE term = ?', (term,)):
+            ids.update(array('I', blob))
+        return ids
+
+    def get_docs(self, ids=None, venue: list=None, year: str=None, rank: list=None, field: list=None, ccf_type: list=None):
+        """按条件筛选论文id"""
+        sql = 'SELECT id FROM doc WHERE 1'
+        args = []
+        if venue:
+            # 支持dblp key或CCF简称
+            sql += f' AND (venue IN ({",".join("?" * len(venue))}) OR lower(name) IN ({",".join("?" * len(venue))}))'
+            args += venue + [i.lower() for i in venue]
+        if year:
+            start_year, _, end_year = year.partition(':') if ':' in year else (year, '', year)
+            # 与--year参数相同，允许2020:2015的写法
+            if start_year and end_year and start_year > end_year:
+                start_year, end_year = end_year, start_year
+            if start_year:
+                sql += ' AND year >= ?'
+                args.append(start_year)
+            if end_year:
+                sql += ' AND year <= ?'
+                args.append(end_year)
+        for column, values in (('rank', rank), ('field', field), ('type', ccf_type)):
+            if values:
+                sql += f' AND {column} IN ({",".join("?" * len(values))})'
+                args += values
+        docs = {row[0] for row in self.conn.execute(sql, args)}
+        return docs if ids is None else docs & ids
+
+    def match_term(self, term: str, universe: set):
+        """词或短语，候选论文包含全部词，再用正则确认
+        非ASCII的词与keywordMatcher相同，在翻译字段中按子串匹配
+        """
+        if not term.isascii():
+            lower = term.lower()
+            candidates = self.match_text(term, universe, ZH_FIELDS)
+            return {doc_id for doc_id, text in self.get_texts(candidates, ZH_FIELDS) if lower in text.lower()}
+
+        tokens = get_tokens(term)
+        candidates = set(universe)
+        for token in tokens:
+            candidates &= self.get_postings(token)
+            if not candidates:
+                return candidates
+
+        # 单个完整的词，倒排结果即为最终结果
+        if len(tokens) == 1 and tokens[0] == term.lower():
+            return candidates
+
+        pattern = re.compile(rf'\b{re.escape(term)}(?!\w)', re.IGNORECASE)
+        return {doc_id for doc_id, text in self.get_texts(candidates) if pattern.search(text)}
+
+    def match_text(self, text: str, universe: set, fields: tuple=TEXT_FIELDS + ZH_FIELDS):
+        """子串匹配，不区分ASCII大小写，3个字符以上使用FTS5索引，更短的逐篇查找"""
+        if len(text) >= 3:
+            query = '{%s} : "%s"' % (' '.join(fields), text.replace('"', '""'))
+            rows = self.conn.execute('SELECT rowid FROM fts WHERE fts MATCH ?', (query,))
+        else:
+            pattern = '%' + re.sub(r'([\\%_])', r'\\\1', text) + '%'
+            rows = self.conn.execute(f'SELECT id FROM doc WHERE {" OR ".join(f"{i} LIKE ? ESCAPE ?" for i in fields)}',
+                                     [pattern, '\\'] * len(fields))
+        return {row[0] for row in rows} & universe
+
+    def get_texts(self, ids, fields: tuple=TEXT_FIELDS):
+        """返回(论文id, 字段用换行连接的文本)，与get_paper_text相同"""
+        ids = list(ids)
+        for i in range(0, len(ids), 900):
+            chunk = ids[i:i+900]
+            for doc_id, *texts in self.conn.execute(f'SELECT id, {", ".join(fields)} FROM doc '
+                                                    f'WHERE id IN ({",".join("?" * len(chunk))})', chunk):
+                yield doc_id, '\n'.join(filter(None, texts))
+
+    def evaluate(self, node: tuple, universe: set, match=None):
+        match = match or self.match_term
+        if node[0] == 'term':
+            return match(node[1], universe)
+        if node[0] == 'not':
+            return universe - self.evaluate(node[1], universe, match)
+        left = self.evaluate(node[1], universe, match)
+        if node[0] == 'and':
+            return left & self.evaluate(node[2], left, match) if left else left
+        return left | self.evaluate(node[2], universe, match)
+
+    def search(self, query: str, **filters):
+        """返回符合条件的论文id"""
+        universe = self.get_docs(**filters)
+        return self.evaluate(parse_query(query), universe) if query.strip() else universe
+
+    def search_text(self, query: str, **filters):
+        """全文搜索，每个词或短语按子串匹配（包括翻译字段），返回按相关度排序的论文id"""
+        universe = self.get_docs(**filters)
+        if not query.strip():
+            return sorted(universe)
+
+        node = parse_query(query)
+        ids = self.evaluate(node, universe, self.match_text)
+
+        # bm25按肯定的词打分，越小越相关，只能逐篇匹配的短词不参与
+        def get_terms(node):
+            if node[0] == 'term':
+                return [node[1]] if len(node[1]) >= 3 else []
+            if node[0] == 'not':
+                return []
+            return get_terms(node[1]) + get_terms(node[2])
+
+        scores = {}
+        if terms := get_terms(node):
+            query = ' OR '.join('"%s"' % i.replace('"', '""') for i in terms)
+            scores = dict(self.conn.execute('SELECT rowid, bm25(fts) FROM fts WHERE fts MATCH ?', (query,)))
+        return sorted(ids, key=lambda x: (scores.get(x, 0), x))
+
+    def get_papers(self, ids):
+        """返回[(论文id, 论文)]，顺序与遍历存储时相同"""
+        ids = list(ids)
+        rows = []
+        for i in range(0, len(ids), 900):
+            chunk = ids[i:i+900]
+            rows += self.conn.execute(f'SELECT venue, id, data FROM doc WHERE id IN ({",".join("?" * len(chunk))})', chunk)
+        return [(doc_id, json.loads(data)) for _, doc_id, data in sorted(rows)]
+
+    def filter_categories(self, keywords_dict: dict):
+        """与utils.filter_categories结果相同的类别过滤，只检查包含关键词的论文"""
+        universe = self.get_docs()
+        # 少于3个字符的中文关键词无法使用FTS5索引，一次遍历翻译字段同时检查
+        short_keys = {key for keywords in keywords_dict.values() for key in keywords if not key.isascii() and len(key) < 3}
+        short_found = {key: set() for key in short_keys}
+        if short_keys:
+            for doc_id, text in self.get_texts(universe, ZH_FIELDS):
+                text = text.lower()
+                for key in short_keys:
+                    if key.lower() in text:
+                        short_found[key].add(doc_id)
+
+        results = {}
+        for category, keywords in keywords_dict.items():
+            found = {}
+            for key in dict.fromkeys(keywords):
+                for doc_id in short_found[key] if key in short_found else self.match_term(key, universe):
+                    found.setdefault(doc_id, set()).add(key)
+            results[category] = [{**paper, 'keywords': sorted(found[doc_id])} for doc_id, paper in self.get_papers(found)]
+        return results
+
+    def close(self):
+        self.conn.close()
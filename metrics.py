@@ -0,0 +1,169 @@
+import os
+import json
+import time
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from urllib.parse import urlparse
+
+"""
+运行指标：各阶段耗时、每个主机的请求数/状态码/延迟分布、每个会议/期刊和类别的论文数
+运行结束时写入JSON报告和Prometheus textfile（node exporter的textfile collector读取）
+只依赖标准库，由utils导入，fetch和推送请求都会记录
+"""
+
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)   # 请求延迟直方图的上界（秒）
+METRICS_PREFIX = 'openccf'
+METRICS_TEXTFILE = 'openccf.prom'   # 默认写入报告目录，可配置为textfile collector目录下的文件
+
+# 与utils.root_path相同，utils导入本模块，不能反过来导入
+root_path = Path(__file__).parent
+metrics_path = root_path.joinpath('cache', 'metrics')  # JSON报告目录，每次运行一个文件
+
+run_start = time.time()
+# 同一阶段可能在多个协程中并发执行，耗时为各次之和
+stage_stats = {}
+host_stats = {}
+venue_stats = {}
+category_stats = {}
+
+
+@contextlib.contextmanager
+def timed(stage: str):
+    """记录阶段耗时，可以包裹同步代码或await"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats = stage_stats.setdefault(stage, {'seconds': 0.0, 'calls': 0})
+        stats['seconds'] += time.perf_counter() - start
+        stats['calls'] += 1
+
+
+def record_request(url: str, status, elapsed: float):
+    """记录一次请求，status为状态码，连接错误或超时为error"""
+    host = urlparse(url).hostname or ''
+    stats = host_stats.setdefault(host, {'requests': 0, 'status': {}, 'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'seconds': 0.0})
+    stats['requests'] += 1
+    stats['status'][str(status)] = stats['status'].get(str(status), 0) + 1
+    stats['seconds'] += elapsed
+    stats['buckets'][next((i for i, bound in enumerate(LATENCY_BUCKETS) if elapsed <= bound), len(LATENCY_BUCKETS))] += 1
+
+
+def record_venue(key: str, **counts):
+    """记录会议/期刊的论文数，如all/new/update"""
+    venue_stats.setdefault(key, {}).update(counts)
+
+
+def record_category(category: str, papers: int):
+    category_stats[category] = papers
+
+
+def get_report(counters: dict=None):
+    """汇总本次运行的指标，counters为其他模块的统计，如{'http': http_stats}"""
+    bounds = [str(i) for i in LATENCY_BUCKETS] + ['+Inf']
+    return {
+        'start': datetime.fromtimestamp(run_start).isoformat(timespec='seconds'),
+        'duration': round(time.time() - run_start, 3),
+        'stages': {name: {'seconds': round(stats['seconds'], 3), 'calls': stats['calls']} for name, stats in stage_stats.items()},
+        'hosts': {
+            host: {
+                'requests': stats['requests'],
+                'status': dict(sorted(stats['status'].items())),
+                'seconds': round(stats['seconds'], 3),
+                'latency': dict(zip(bounds, stats['buckets'])),
+            }
+            for host, stats in sorted(host_stats.items())
+        },
+        'venues': dict(sorted(venue_stats.items())),
+        'categories': category_stats,
+        'counters': counters or {},
+    }
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_prometheus(report: dict) -> str:
+    """Prometheus文本格式，都是本次运行的值，所以计数也使用gauge"""
+    lines = []
+
+    def metric(name: str, kind: str, doc: str, samples: list):
+        """samples为[(标签, 值)]"""
+        if not samples:
+            return
+        name = f'{METRICS_PREFIX}_{name}'
+        lines.append(f'# HELP {name} {doc}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in samples:
+            label = ','.join(f'{k}="{escape_label(v)}"' for k, v in labels.items())
+            lines.append(f'{name}{{{label}}} {value}' if label else f'{name} {value}')
+
+    metric('run_timestamp_seconds', 'gauge', 'Start time of the last run.', [({}, int(run_start))])
+    metric('run_duration_seconds', 'gauge', 'Duration of the last run.', [({}, report['duration'])])
+    metric('stage_seconds', 'gauge', 'Time spent in each stage, summed over concurrent tasks.',
+           [({'stage': name}, stats['seconds']) for name, stats in report['stages'].items()])
+    metric('stage_calls', 'gauge', 'Number of times each stage ran.',
+           [({'stage': name}, stats['calls']) for name, stats in report['stages'].items()])
+    metric('http_requests', 'gauge', 'HTTP requests by host and status, error for timeouts and connection errors.',
+           [({'host': host, 'status': status}, count) for host, stats in report['hosts'].items() for status, count in stats['status'].items()])
+
+    name = f'{METRICS_PREFIX}_http_request_duration_seconds'
+    if report['hosts']:
+        lines.append(f'# HELP {name} HTTP request latency by host.')
+        lines.append(f'# TYPE {name} histogram')
+    for host, stats in report['hosts'].items():
+        label = escape_label(host)
+        total = 0
+        for bound, count in stats['latency'].items():
+            total += count
+            lines.append(f'{name}_bucket{{host="{label}",le="{bound}"}} {total}')
+        lines.append(f'{name}_sum{{host="{label}"}} {stats["seconds"]}')
+        lines.append(f'{name}_count{{host="{label}"}} {stats["requests"]}')
+
+    metric('venue_papers', 'gauge', 'Papers of each venue, by type (all, new, update).',
+           [({'venue': key, 'type': kind}, count) for key, counts in report['venues'].items() for kind, count in counts.items()])
+    metric('category_papers', 'gauge', 'Papers matched by each category.',
+           [({'category': category}, count) for category, count in report['categories'].items()])
+    metric('counter', 'gauge', 'Other statistics of the last run, such as cache hits and translation failures.',
+           [({'group': group, 'name': key}, round(value, 3))
+            for group, counters in report['counters'].items() for key, value in counters.items() if isinstance(value, (int, float))])
+
+    return '\n'.join(lines) + '\n'
+
+
+def write_atomic(file: Path, text: str):
+    """先写临时文件再替换，避免node exporter读到一半的文件"""
+    file.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = file.with_name(f'.{file.name}.{os.getpid()}')
+    temp_file.write_text(text)
+    temp_file.replace(file)
+
+
+def get_metrics_path(conf: dict):
+    # 配置中的相对路径以项目目录为准
+    return root_path.joinpath(conf['path']) if conf.get('path') else metrics_path
+
+
+def get_last_counter(conf: dict, group: str, name: str):
+    """之前运行中最近一次记录的统计值，如上次的爬取速度，没有时返回None"""
+    for report_file in sorted(get_metrics_path(conf).glob('run-*.json'), reverse=True):
+        try:
+            value = json.loads(report_file.read_text())['counters'].get(group, {}).get(name)
+        except (ValueError, KeyError):
+            continue
+        if value is not None:
+            return value
+    return None
+
+
+def write_metrics(conf: dict, counters: dict=None):
+    """写入JSON报告和Prometheus textfile，返回报告文件"""
+    report = get_report(counters)
+    path = get_metrics_path(conf)
+    report_file = path.joinpath(f'run-{datetime.fromtimestamp(run_start):%Y%m%d-%H%M%S}.json')
+    write_atomic(report_file, json.dumps(report, indent=4, ensure_ascii=False) + '\n')
+    write_atomic(root_path.joinpath(conf['textfile']) if conf.get('textfile') else path.joinpath(METRICS_TEXTFILE),
+                 format_prometheus(report))
+    return report_file
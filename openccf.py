@@ -1,15 +1,22 @@
 #!/usr/bin/python3
 
 import os
+import sys
 import json
+import time
 import json5
+import asyncio
 import argparse
 import pyfiglet
+import itertools
 from datetime import datetime
-from concurrent.futures import ProcessPoolExecutor
-from pyrate_limiter import Duration, Rate, InMemoryBucket, Limiter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 
 from utils import *
+from store import *
+from index import *
+from history import *
+from profiler import *
 from bots import *
 from crawler import *
 from crawler.libpaper import *
@@ -30,10 +37,10 @@ def make_bitable(data) -> dict:
             '刊物': data['dblp_url'].split('/')[-2],
             '标签': data['keywords'],
             '摘要': data['abstract_zh'] or data['abstract'],
-            '总结': data['tldr_zh'] or data['tldr'],
+            '总结': data.get('tldr_zh') or data.get('tldr') or '',
             '网址': {'text': data['url'], 'link': data['url']},
         }
-        if pdf_url := data['files']['openAccessPdf']:
+        if pdf_url := data.get('files', {}).get('openAccessPdf'):
             fields['文件'] = {'text': pdf_url, 'link': pdf_url}
 
         return fields
@@ -61,10 +68,10 @@ def make_database(data) -> dict:
             '刊物': data['dblp_url'].split('/')[-2],
             '标签': data['keywords'],
             '摘要': data['abstract_zh'] or data['abstract'],
-            '总结': data['tldr_zh'] or data['tldr'],
+            '总结': data.get('tldr_zh') or data.get('tldr') or '',
             '网址': data['url'],
         }
-        if pdf_url := data['files']['openAccessPdf']:
+        if pdf_url := data.get('files', {}).get('openAccessPdf'):
             fields['文件'] = pdf_url
 
         return fields
@@ -76,35 +83,60 @@ def make_database(data) -> dict:
 
 
 def translate_all_empty():
-    """将空的中文摘要和标题全部翻译"""
+    """将空的中文摘要和标题全部翻译
+    多线程并行翻译，每个翻译器单独限速，定期把已完成的结果写入存储
+    """
     console.print('Translating...', style='bold yellow')
 
-    for file in dblp_path.glob('*.json'):
-        empty_num = 0
-        data = json.loads(file.read_text())
-        for year, year_data in data.items():
-            for i, item in enumerate(year_data):
-                for j, paper in enumerate(item['papers']):
-                    if paper['title'] and paper['title_zh'].isascii():
-                        data[year][i]['papers'][j]['title_zh'] = get_translate(paper['title'])
-                        empty_num += 1
-                    if paper['abstract'] and paper['abstract_zh'].isascii():
-                        data[year][i]['papers'][j]['abstract_zh'] = get_translate(paper['abstract'])
-                        empty_num += 1
-                    if paper['tldr'] and paper['tldr_zh'].isascii():
-                        data[year][i]['papers'][j]['tldr_zh'] = get_translate(paper['tldr'])
-                        empty_num += 1
-
-        if empty_num:
-            print(file.name, empty_num)
-
-            with open(file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=4)
+    store = get_store()
+    venues = {}
+    jobs = []
+    for key, data in store.items():
+        venues[key] = data
+        for year_data in data.values():
+            for item in year_data:
+                for paper in item['papers']:
+                    for field in ('title', 'abstract', 'tldr'):
+                        if paper.get(field) and paper.get(f'{field}_zh', '').isascii():
+                            jobs.append((key, item['dblp_url'], paper, field))
+
+    changed = {}
+    def flush():
+        for key, papers in changed.items():
+            print(key, len(papers))
+            store.update_papers(key, venues[key], list(papers.values()))
+        changed.clear()
+
+    translate_conf = conf.get('translate', {})
+    workers = translate_conf.get('workers', TRANSLATE_WORKERS)
+    flush_interval = translate_conf.get('flush', TRANSLATE_FLUSH_INTERVAL)
+    start_time = last_flush = time.time()
+    done = 0
+    with timed('translate'), profiled('translate'), ThreadPoolExecutor(workers) as executor, progress() as bar:
+        task = bar.add_task('Translating', total=len(jobs))
+        futures = {executor.submit(get_translate, job[2][job[3]]): job for job in jobs}
+        for future in as_completed(futures):
+            key, dblp_url, paper, field = futures[future]
+            if result := future.result():
+                paper[f'{field}_zh'] = result
+                changed.setdefault(key, {})[id(paper)] = (dblp_url, paper)
+                done += 1
+            bar.advance(task)
+
+            if time.time() - last_flush > flush_interval:
+                flush()
+                last_flush = time.time()
+    flush()
+    sync_index()
+
+    elapsed = time.time() - start_time
+    console.print(f'Translated: {done}/{len(jobs)}\tFailures: {translate_stats["failures"]}\t'
+                  f'Time: {elapsed:.1f}s\tRate: {done / max(elapsed, 1e-6):.2f} fields/s', style='bold yellow')
 
 
 def func_broker(url: str):
     """选择解析函数"""
-    dblp_key = '/'.join(url.split('/')[-3:-1])
+    dblp_key = get_dblp_key(url)
     func_map = {
         'conf/sp': get_sp_data,
         'conf/ccs': get_ccs_data,
@@ -194,8 +226,9 @@ def crawl_papers():
     """爬取论文"""
     # 获取CCF数据
     console.print('Getting ccf...', style='bold yellow')
-    ccf_data = get_ccf_data(update=False)
-    urls = parse_rule(ccf_data, rule)
+    with timed('ccf_load'), profiled('ccf_load'):
+        ccf_data = get_ccf_data(update=False)
+        urls = parse_rule(ccf_data, rule)
 
     # 获取全量论文
     total_num = 0
@@ -204,16 +237,34 @@ def crawl_papers():
     total_data = []
     total_new_data = []
     total_update_data = []
+    # 新增和更新的论文：{dblp key: {(目录页, 标题hash)}}
+    delta = {}
 
     # 获取基础数据及网址
     console.print('Getting papers...', style='bold yellow')
-    executor = ProcessPoolExecutor(os.cpu_count()-1)
-    tasks = [executor.submit(get_dblp_data, url, start_year, end_year) for url in urls]
-    executor.shutdown(wait=True)
-
-    for task in tasks:
-        url, all_data, new_data, update_data = task.result()
-
+    start_time = time.time()
+    before = http_stats.copy()
+    with timed('crawl'), profiled('crawl'):
+        if args.source == 'dblp-xml':
+            # 离线导入，不访问网络
+            results = get_dblp_xml_data(args.dblp_xml, urls, start_year, end_year, ccf_data)
+        else:
+            crawler_conf = conf.get('crawler', {})
+            workers = crawler_conf.get('workers', CRAWL_WORKERS)
+            processes = crawler_conf.get('processes', PARSE_PROCESSES)
+            parser = crawler_conf.get('parser', TOC_PARSER)
+            # 断点续爬日志，全部完成后删除，中断后可用--resume继续或--fresh重新开始
+            journal = crawlJournal(resume=args.resume, fresh=args.fresh)
+            try:
+                results = asyncio.run(crawl_dblp(urls, start_year, end_year, workers, processes, parser, journal))
+            except BaseException:
+                journal.close()
+                raise
+            journal.close(remove=True)
+    elapsed = time.time() - start_time
+    stats = {k: v - before[k] for k, v in http_stats.items()}
+
+    for url, all_data, new_data, update_data in results:
         all_num = sum(len(j['papers']) for i in all_data.values() for j in i)
         new_num = sum(len(j['papers']) for i in new_data.values() for j in i)
         update_num = sum(len(j['papers']) for i in update_data.values() for j in i)
@@ -222,6 +273,9 @@ def crawl_papers():
         total_num += all_num
         total_new_num += new_num
         total_update_num += update_num
+        record_venue(get_dblp_key(url), all=all_num, new=new_num, update=update_num)
+        if ids := get_delta_ids(new_data) | get_delta_ids(update_data):
+            delta.setdefault(get_dblp_key(url), set()).update(ids)
         # total_data.append(all_data)
         # total_new_data.append(new_data)
         # total_update_data.append(update_data)
@@ -231,98 +285,273 @@ def crawl_papers():
         #     paper_data = get_paper_data(all_data)
 
     console.print(f'All Papers: {total_num}\tNew Papers: {total_new_num}\tUpdate Papers: {total_update_num}', style='bold yellow')
+    console.print(f'Skipped Venues: {crawl_stats["skipped_venues"]}/{crawl_stats["venues"]}\t'
+                  f'Skipped Years: {crawl_stats["skipped_years"]}/{crawl_stats["years"]}\t'
+                  f'Skipped TOCs: {crawl_stats["skipped_tocs"]}/{crawl_stats["tocs"]}', style='bold yellow')
+    # 本次的爬取速度写入运行指标，下次运行时对比
+    last_rate = get_last_counter(conf.get('metrics', {}), 'crawl', 'rate')
+    crawl_stats['rate'] = round(stats['requests'] / max(elapsed, 1e-6), 2)
+    console.print(f'Requests: {stats["requests"]}\tCache Hits: {stats["cache_hits"]}\tNot Modified: {stats["not_modified"]}\t'
+                  f'Time: {elapsed:.1f}s\tRate: {crawl_stats["rate"]:.2f} req/s'
+                  + (f' (last run: {last_rate:.2f} req/s)' if last_rate is not None else ''), style='bold yellow')
+    if loop_stats['samples']:
+        console.print(f'Loop Blocked: {loop_stats["blocked"]:.1f}s\tStalls: {loop_stats["stalls"]}\t'
+                      f'Max Lag: {loop_stats["max_lag"] * 1000:.0f}ms', style='bold yellow')
+
+    sync_index()
+
+    # 翻译摘要和标题，离线模式不访问网络
+    if args.source != 'dblp-xml':
+        translate_all_empty()
+
+    return delta
+
+
+def get_delta_ids(data: dict):
+    """论文的id：(目录页, 标题hash)，与存储更新论文时相同"""
+    return {(item['dblp_url'], get_title_hash(paper['title'])) for year_data in data.values() for item in year_data for paper in item['papers']}
+
+
+def filter_delta(keywords_dict: dict, delta: dict):
+    """只过滤新增和更新的论文，并修改类别文件中对应的论文，返回{类别: 新增和更新后命中的论文}"""
+    category_files = {category: data_path.joinpath(f'{category}.json') for category in keywords_dict}
+    console.print(f'\[{",".join(keywords_dict)}] Filtering {sum(len(i) for i in delta.values())} papers...', style='bold yellow')
+    matchers = {category: get_matcher(tuple(keywords)) for category, keywords in keywords_dict.items()}
+    delta_data = {category: [] for category in keywords_dict}
+    store = get_store()
+    for key, ids in delta.items():
+        # 重新读取，包含翻译结果
+        data = {}
+        for year, year_data in store.load(key).items():
+            for item in year_data:
+                if papers := [i for i in item['papers'] if (item['dblp_url'], get_title_hash(i['title'])) in ids]:
+                    data.setdefault(year, []).append({**item, 'papers': papers})
+        for category, papers in filter_categories(data, matchers).items():
+            delta_data[category] += papers
+
+    if not all(i.exists() for i in category_files.values()):
+        # 第一次运行，没有可以修改的类别文件，完整过滤生成类别文件
+        console.print(f'\[{",".join(keywords_dict)}] No category files yet, filtering all papers', style='bold yellow')
+        filter_all_papers(keywords_dict)
+        return delta_data
+
+    all_ids = set().union(*delta.values())
+    for category, category_file in category_files.items():
+        # 去掉旧版本（更新后可能不再命中），加入新版本
+        papers = [i for i in json.loads(category_file.read_text()) if (i['dblp_url'], get_title_hash(i['title'])) not in all_ids]
+        papers = sorted(papers + delta_data[category], key=lambda x: x['url'])
+        with open(category_file, 'w') as f:
+            json.dump(papers, f, indent=4, ensure_ascii=False)
+
+        console.print(f'\[{category}] Papers: {len(papers)}\tDelta Papers: {len(delta_data[category])}', style='bold yellow')
+    return delta_data
+
+
+def filter_venue(dblp_key: str, keywords_dict: dict):
+    """过滤一个会议/期刊的论文，可以在子进程中执行，返回{类别: 论文列表}"""
+    data = get_store().load(dblp_key)
+    matchers = {category: get_matcher(tuple(keywords)) for category, keywords in keywords_dict.items()}
+    return filter_categories(data, matchers)
+
+
+def filter_all_papers(keywords_dict: dict):
+    """过滤论文，每个会议/期刊只读取一次，同时匹配所有类别，返回{类别: 论文列表}"""
+    console.print(f'\[{",".join(keywords_dict)}] Filtering papers...', style='bold yellow')
+
+    keys = get_store().keys()
+    processes = conf.get('filter', {}).get('processes', FILTER_PROCESSES)
+    total_data = {category: [] for category in keywords_dict}
+    if conf.get('filter', {}).get('index'):
+        # 使用倒排索引，只检查包含关键词的论文
+        index = paperIndex()
+        index.update()
+        results = [index.filter_categories(keywords_dict)]
+        index.close()
+    elif processes:
+        with ProcessPoolExecutor(processes, **pool_initializer(init_worker_store, (conf.get('store', {}),))) as executor:
+            results = list(executor.map(filter_venue, keys, itertools.repeat(keywords_dict)))
+    else:
+        results = [filter_venue(key, keywords_dict) for key in keys]
 
-    # 翻译摘要和标题
-    translate_all_empty()
+    for result in results:
+        for category, papers in result.items():
+            total_data[category] += papers
+
+    for category, papers in total_data.items():
+        # 按url排序
+        total_data[category] = sorted(papers, key=lambda x: x['url'])
+
+        category_file = data_path.joinpath(f'{category}.json')
+        with open(category_file, 'w') as f:
+            json.dump(total_data[category], f, indent=4, ensure_ascii=False)
+
+        console.print(f'\[{category}] Papers: {len(total_data[category])}', style='bold yellow')
+    return total_data
 
 
 def filter_papers(category: str, keywords: list):
     """过滤论文"""
-    console.print(f'\[{category}] Filtering papers...', style='bold yellow')
-
-    total_data = []
-    category_file = data_path.joinpath(f'{category}.json')
-    for file in dblp_path.glob('*.json'):
-        data = json.loads(file.read_text())
-        filter_data = filter_keywords(data, keywords)
-        total_data += filter_data
+    return filter_all_papers({category: keywords})[category]
 
-    # 按url排序
-    sorted_data = sorted(total_data, key=lambda x: x['url'])
 
-    with open(category_file, 'w') as f:
-        json.dump(sorted_data, f, indent=4, ensure_ascii=False)
+def update_index(rebuild: bool=False):
+    """增量更新索引，只重新索引数据有变化的会议/期刊"""
+    index = paperIndex()
+    start = time.perf_counter()
+    if updated := index.update(rebuild=rebuild):
+        console.print(f'Indexed {updated} venues in {time.perf_counter() - start:.2f}s', style='bold yellow')
+    return index
 
-    console.print(f'\[{category}] Papers: {len(sorted_data)}', style='bold yellow')
-    return sorted_data
 
+def sync_index():
+    """爬取和翻译写入论文后同步索引"""
+    if conf.get('index', {}).get('sync', INDEX_SYNC):
+        with timed('index_sync'), profiled('index_sync'):
+            update_index().close()
 
-def send_papers(category: str, total_data: list):
-    """发送论文"""
-    bot_data = []
-    table_data = []
-    table_data_temp = []
 
-    if args.bot == 'feishu':
-        bitable_history_file = history_path.joinpath(f'feishu_bitable_{category}.txt')
-        bitable_history_data = bitable_history_file.read_text().splitlines() if bitable_history_file.exists() else []
-        bot_history_file = history_path.joinpath(f'feishu_bot_{category}.txt')
-        bot_history_data = bot_history_file.read_text().splitlines() if bot_history_file.exists() else []
-
-        console.print(f'\[{category}] Sending bot...', style='bold yellow')
-        rates = [Rate(100, Duration.MINUTE)] # 频率限制，100条/分钟
-        bucket = InMemoryBucket(rates)
-        limiter = Limiter(bucket, max_delay=Duration.MINUTE.value)
-        for data in total_data:
-            limiter.try_acquire('identity')
-            title = data['title']
+def query_papers():
+    """使用索引查询论文，query为布尔查询，search为按相关度排序的全文搜索"""
+    index = update_index(args.rebuild)
+    split = lambda x: x.split(',') if x else None
+    filters = dict(venue=split(args.venue), year=args.year, rank=split(args.rank), field=split(args.field), ccf_type=split(args.type))
 
-            # 发送机器人消息
-            if title not in bot_history_data and bot.send(data):
-                bot_data.append(title)
-
-            # 多维表格临时数据
-            if title not in bitable_history_data:
-                table_data_temp.append(data)
-
-        # 更新多维表格
-        console.print(f'\[{category}] Updating bitable...', style='bold yellow')
-        if oper.check_access_valid(feishuOper.TOKEN_TENANT):
-            # 每组100条数据
-            split_list = [table_data_temp[i:i+100] for i in range(0, len(table_data_temp), 100)]
-            for split_data in split_list:
-                data = make_bitable(split_data)
-                if oper.bitable_batch_create(table[category], data):
-                    table_data += [i['title'] for i in split_data]
+    start = time.perf_counter()
+    try:
+        if args.command == 'search':
+            ids = index.search_text(' '.join(args.query), **filters)
+            found = dict(index.get_papers(ids[:args.limit]))
+            papers = [found[i] for i in ids[:args.limit]]
+        else:
+            ids = index.search(' '.join(args.query), **filters)
+            papers = sorted((paper for _, paper in index.get_papers(ids)), key=lambda x: x['year'], reverse=True)[:args.limit]
+    except ValueError as e:
+        console.print(f'Query error: {e}', style='bold red')
+        return
+    finally:
+        index.close()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        sys.stdout.write(json.dumps(papers, indent=4, ensure_ascii=False) + "\n")
+        return
+
+    for paper in papers:
+        console.print(f'[{paper["year"]}] {paper["conf_title"]}', style='bold green', markup=False)
+        console.print(f'  {paper["title"]}', markup=False)
+        if paper.get('title_zh'):
+            console.print(f'  {paper["title_zh"]}', markup=False)
+        console.print(f'  {paper["url"]}', style='bold blue', markup=False)
+    console.print(f'Found: {len(ids)}\tShown: {len(papers)}\tTime: {elapsed:.1f}ms', style='bold yellow')
+
+
+async def send_feishu(category: str, items: list, bot_history, bitable_history):
+    """并发发送机器人消息和写入多维表格，items为[(论文id, 论文)]，返回每部分的成功和失败数量"""
+    feishu_conf = conf['feishu'].get('limit', {})
+    sem = asyncio.Semaphore(feishu_conf.get('concurrency', FEISHU_CONCURRENCY))
+    batch_size = feishu_conf.get('batch', FEISHU_BITABLE_BATCH)
+    if bot and 'bot_rate' in feishu_conf:
+        bot.limiter = rateLimiter(feishu_conf['bot_rate'] / 60, FEISHU_BOT_BURST)
+    stats = {'bot_sent': [], 'bot_failed': [], 'table_sent': [], 'table_failed': [], 'batches': 0, 'batch_failed': 0}
+
+    async def send_bot(key: str, data: dict):
+        async with sem:
+            ok = await bot.send_async(data)
+        bot_history.record([(key, data)], STATUS_SENT if ok else STATUS_FAILED)
+        stats['bot_sent' if ok else 'bot_failed'].append(key)
+
+    async def send_batch(batch: list):
+        async with sem:
+            ok = await oper.bitable_batch_create_async(table[category], make_bitable([i[1] for i in batch]))
+        bitable_history.record(batch, STATUS_SENT if ok else STATUS_FAILED)
+        stats['batches'] += 1
+        stats['batch_failed'] += not ok
+        stats['table_sent' if ok else 'table_failed'].extend(i[0] for i in batch)
+
+    tasks = []
+    bot_items = [(key, data) for key, data in dict(items).items() if not bot_history.is_sent(data, key)]
+    if bot and bot_items:
+        console.print(f'\[{category}] Sending bot: {len(bot_items)}', style='bold yellow')
+        tasks += [send_bot(key, data) for key, data in bot_items]
+
+    table_items = [(key, data) for key, data in dict(items).items() if not bitable_history.is_sent(data, key)]
+    if oper and table_items:
+        console.print(f'\[{category}] Updating bitable: {len(table_items)}', style='bold yellow')
+        if await asyncio.to_thread(oper.check_access_valid, feishuOper.TOKEN_TENANT):
+            bitable_history.record(table_items, STATUS_PENDING)
+            tasks += [send_batch(table_items[i:i+batch_size]) for i in range(0, len(table_items), batch_size)]
         else:
             console.print(f'\[{category}] 权限验证失败', style='bold red')
 
-        with open(bot_history_file, 'w') as f:
-            f.write('\n'.join(bot_history_data + bot_data))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await close_client()
+    return stats
+
+
+async def sync_wolai(category: str, items: list, database_history):
+    """把未写入的论文全部写入数据表格，items为[(论文id, 论文)]
+    每批完成后写入推送记录，中断后再次运行从未完成的批次继续
+    """
+    wolai_conf = conf['wolai'].get('limit', {})
+    sem = asyncio.Semaphore(wolai_conf.get('concurrency', WOLAI_CONCURRENCY))
+    if oper and 'rate' in wolai_conf:
+        oper.limiter = rateLimiter(wolai_conf['rate'], wolai_conf['rate'])
+    stats = {'table_sent': [], 'table_failed': [], 'batches': 0, 'batch_failed': 0}
+
+    table_items = [(key, data) for key, data in dict(items).items() if not database_history.is_sent(data, key)]
+    if not oper or not table_items:
+        return stats
+
+    # 更新数据表格
+    console.print(f'\[{category}] Updating database: {len(table_items)}', style='bold yellow')
+    database_history.record(table_items, STATUS_PENDING)
+
+    async def send_batch(batch: list):
+        async with sem:
+            ok = await oper.database_post_async(table[category], make_database([i[1] for i in batch]))
+        database_history.record(batch, STATUS_SENT if ok else STATUS_FAILED)
+        stats['batches'] += 1
+        stats['batch_failed'] += not ok
+        stats['table_sent' if ok else 'table_failed'].extend(i[0] for i in batch)
+        bar.advance(task)
+
+    try:
+        with progress() as bar:
+            task = bar.add_task('Syncing', total=(len(table_items) + WOLAI_BATCH - 1) // WOLAI_BATCH)
+            await asyncio.gather(*[send_batch(table_items[i:i+WOLAI_BATCH]) for i in range(0, len(table_items), WOLAI_BATCH)])
+    finally:
+        await close_client()
+    return stats
+
 
-        with open(bitable_history_file, 'w') as f:
-            f.write('\n'.join(bitable_history_data + table_data))
+def send_papers(category: str, total_data: list):
+    """发送论文，推送记录以论文DOI或网址加标题hash为键"""
+    bot_data = []
+    table_data = []
+    keys = get_paper_keys(total_data)
+
+    if args.bot == 'feishu':
+        bitable_history = deliveryHistory(f'feishu_bitable_{category}')
+        bot_history = deliveryHistory(f'feishu_bot_{category}')
+        with timed('delivery'), profiled('delivery'):
+            stats = asyncio.run(send_feishu(category, list(zip(keys, total_data)), bot_history, bitable_history))
+        bot_data = stats['bot_sent']
+        table_data = stats['table_sent']
+        console.print(f'\[{category}] Bot Failed: {len(stats["bot_failed"])}\tBatches: {stats["batches"]}\t'
+                      f'Batch Failed: {stats["batch_failed"]}\tTable Failed: {len(stats["table_failed"])}', style='bold yellow')
+        bot_history.close()
+        bitable_history.close()
 
     elif args.bot == 'wolai':
-        database_history_file = history_path.joinpath(f'wolai_database_{category}.txt')
-        database_history_data = database_history_file.read_text().splitlines() if database_history_file.exists() else []
-
-        # 更新数据表格
-        console.print(f'\[{category}] Updating database...', style='bold yellow')
-        table_data_temp = [
-            data
-            for data in total_data
-            if data['title'] not in database_history_data
-        ]
-        # 每组20条数据
-        split_list = [table_data_temp[i:i+20] for i in range(0, len(table_data_temp), 20)][:1]
-        for split_data in split_list:
-            data = make_database(split_data)
-            if oper.database_post(table[category], data):
-                table_data += [i['title'] for i in split_data]
-
-        with open(database_history_file, 'w') as f:
-            f.write('\n'.join(database_history_data + table_data))
+        database_history = deliveryHistory(f'wolai_database_{category}')
+        with timed('delivery'), profiled('delivery'):
+            stats = asyncio.run(sync_wolai(category, list(zip(keys, total_data)), database_history))
+        table_data = stats['table_sent']
+        console.print(f'\[{category}] Batches: {stats["batches"]}\tBatch Failed: {stats["batch_failed"]}\t'
+                      f'Table Failed: {len(stats["table_failed"])}', style='bold yellow')
+        database_history.close()
 
     console.print(f'\[{category}] Papers: {len(total_data)}\tSend Papers: {len(bot_data)}\tUpdate Papers: {len(table_data)}', style='bold yellow')
 
@@ -337,6 +566,29 @@ def parse_args():
     parser.add_argument('--category', type=str, metavar='category', default='', help='e.g. vehicle,android,linux')
     parser.add_argument('--keywords', type=str, metavar='keywords', default='', help='e.g. keyword1,keyword2')
     parser.add_argument('--bot', type=str, metavar='bot', default='feishu', help='e.g. feishu')
+    parser.add_argument('--source', type=str, choices=['dblp', 'dblp-xml'], default='dblp', help='dblp: crawl dblp.org; dblp-xml: import from local dump')
+    parser.add_argument('--dblp-xml', type=str, metavar='file', default='dblp.xml.gz', help='e.g. dblp.xml.gz')
+    parser.add_argument('--resume', action='store_true', help='resume an interrupted crawl from the checkpoint journal')
+    parser.add_argument('--fresh', action='store_true', help='discard the checkpoint journal of an interrupted crawl')
+    parser.add_argument('--delta', action='store_true', help='filter and send only new and updated papers from this crawl')
+    parser.add_argument('--profile', action='store_true', help='profile each stage, including worker processes, see profiler.py')
+
+    # query和search共用的筛选参数
+    index_parser = argparse.ArgumentParser(add_help=False)
+    index_parser.add_argument('--venue', type=str, metavar='venue', default='', help='dblp key or CCF name, e.g. conf/uss,NDSS')
+    index_parser.add_argument('--year', type=str, metavar='start:end', default='', help='e.g. 2020:2023, 2020:, 2022')
+    index_parser.add_argument('--rank', type=str, metavar='rank', default='', help='e.g. A,B')
+    index_parser.add_argument('--field', type=str, metavar='field', default='', help='e.g. NIS')
+    index_parser.add_argument('--type', type=str, metavar='type', default='', help='e.g. conf')
+    index_parser.add_argument('--limit', type=int, metavar='num', default=20, help='number of papers to show')
+    index_parser.add_argument('--rebuild', action='store_true', help='rebuild the whole index')
+    index_parser.add_argument('--json', action='store_true', help='print papers as json')
+
+    subparsers = parser.add_subparsers(dest='command')
+    query_parser = subparsers.add_parser('query', parents=[index_parser], help='search papers with the inverted index')
+    query_parser.add_argument('query', type=str, nargs='+', help='e.g. "CAN bus" AND (attack OR fuzzing) NOT survey')
+    search_parser = subparsers.add_parser('search', parents=[index_parser], help='ranked full-text search, including translations')
+    search_parser.add_argument('query', type=str, nargs='+', help='e.g. 车联网 "side channel"')
     return parser.parse_args()
 
 
@@ -344,12 +596,23 @@ if __name__ == '__main__':
     if Path('.env').exists():
         from dotenv import load_dotenv
         load_dotenv('.env')
-    print(pyfiglet.figlet_format('OpenCCF'))
-
     # 参数解析
     args = parse_args()
+    # 输出json时不打印标题，方便重定向
+    if not getattr(args, 'json', False):
+        print(pyfiglet.figlet_format('OpenCCF'))
     conf = json5.loads(Path('config.json5').read_text())
     proxy_url = conf['proxy']
+    init_http(conf.get('http', {}))
+    init_store(conf.get('store', {}))
+    init_translate(conf.get('translate', {}))
+
+    if args.command in ('query', 'search'):
+        query_papers()
+        exit()
+
+    if args.profile:
+        console.print(f'Profiling: {start_profile(conf.get("profile", {}))}', style='bold yellow')
 
     secrets = conf['openai']['name']
     openai_key = os.getenv(secrets) or conf['openai']['key']
@@ -368,12 +631,14 @@ if __name__ == '__main__':
     if args.keywords:
         keywords_dict = {i: args.keywords.split(',') for i in category_list}
     else:
+        # 中文关键词在机器翻译的字段中按子串匹配，误报较多，默认不使用
+        match_zh = conf.get('filter', {}).get('match_zh', FILTER_MATCH_ZH)
         for category in category_list:
             keywords_dict[category] = [
                 j
                 for i in conf['keywords'][category].values()
                 for j in i
-                if j.isascii()
+                if match_zh or j.isascii()
             ]
 
     year = args.year or conf['year']
@@ -384,11 +649,27 @@ if __name__ == '__main__':
     bot, oper, table = init_bot(args.bot, conf)
 
     # 爬取论文
-    crawl_papers()
+    delta = crawl_papers()
+
+    # 过滤论文，增量模式只过滤和发送新增和更新的论文
+    with timed('filter'), profiled('filter'):
+        if args.delta:
+            filter_data = filter_delta(keywords_dict, delta)
+        else:
+            filter_data = filter_all_papers(keywords_dict)
+    for category, total_data in filter_data.items():
+        record_category(category, len(total_data))
+
+    # 发送论文，没有配置机器人和表格时跳过
+    if bot or oper:
+        for category, total_data in filter_data.items():
+            send_papers(category, total_data)
+    else:
+        console.print(f'No {args.bot} bot or table configured, skip sending', style='bold yellow')
 
-    for category, keywords in keywords_dict.items():
-        # 过滤论文
-        total_data = filter_papers(category, keywords)
+    console.print(f'Translate Cache Hits: {translate_stats["hits"]}\tMisses: {translate_stats["misses"]}', style='bold yellow')
 
-        # 发送论文
-        # send_papers(category, total_data)
+    # 运行指标：JSON报告和Prometheus textfile
+    counters = {'http': http_stats, 'crawl': crawl_stats, 'translate': translate_stats, 'loop': loop_stats}
+    report_file = write_metrics(conf.get('metrics', {}), counters)
+    console.print(f'Metrics: {report_file}', style='bold yellow')
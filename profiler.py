@@ -0,0 +1,158 @@
+import os
+import sys
+import atexit
+import pstats
+import cProfile
+import threading
+import contextlib
+import multiprocessing.util
+from pathlib import Path
+from datetime import datetime
+
+from utils import root_path, cache_path
+
+"""
+性能分析（--profile）：每个阶段一个cProfile，同时用采样分析记录所有线程的调用栈
+cProfile只分析主线程的同步调用，协程、翻译线程和等待时间通过采样得到
+进程池的子进程各自分析，结果都写入同一个运行目录：
+    main-<阶段>.prof        主进程每个阶段的cProfile结果
+    worker-<pid>.prof       子进程的cProfile结果
+    <pid>.folded            每个进程的采样结果，每行为"进程;阶段;线程;调用栈 次数"
+    merged.prof             合并的cProfile结果，可用snakeviz等查看
+    profile.folded          合并的采样结果，可用flamegraph.pl或speedscope生成火焰图
+未开启时只有一次判断，不影响运行速度
+"""
+
+PROFILE_INTERVAL = 0.005        # 采样间隔（秒）
+PROFILE_TOP = 20                # 结束时打印耗时最多的函数数量
+
+profile_dir = None
+current_stage = 'main'
+stage_profiles = {}
+sampler = None
+profile_path = cache_path.joinpath('profile')   # 每次运行在其下创建一个目录
+
+
+class stackSampler(threading.Thread):
+    """定期获取所有线程的调用栈，按"阶段;线程;调用栈"计数"""
+
+    def __init__(self, process: str, interval: float=PROFILE_INTERVAL):
+        super().__init__(name='profile-sampler', daemon=True)
+        self.process = process
+        self.interval = interval
+        self.counts = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == self.ident:
+                    continue
+                stack = []
+                while frame:
+                    code = frame.f_code
+                    stack.append(f'{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})')
+                    frame = frame.f_back
+                key = ';'.join([self.process, current_stage, names.get(ident, str(ident)), *reversed(stack)])
+                self.counts[key] = self.counts.get(key, 0) + 1
+
+    def stop(self, file: Path):
+        self.stopped.set()
+        self.join()
+        # 火焰图工具以最后一个空格分隔调用栈和次数
+        file.write_text(''.join(f'{stack} {count}\n' for stack, count in self.counts.items()))
+
+
+def start_profile(conf: dict):
+    """开启分析，创建运行目录，退出时写入结果"""
+    global profile_dir, sampler
+    # 配置中的相对路径以项目目录为准
+    path = root_path.joinpath(conf['path']) if conf.get('path') else profile_path
+    profile_dir = path.joinpath(f'{datetime.now():%Y%m%d-%H%M%S}')
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    sampler = stackSampler('main', conf.get('interval', PROFILE_INTERVAL))
+    sampler.start()
+    atexit.register(stop_profile)
+    return profile_dir
+
+
+def stop_profile():
+    """写入主进程的结果，合并所有进程的结果"""
+    global sampler
+    if not sampler:
+        return
+    sampler.stop(profile_dir.joinpath(f'{os.getpid()}.folded'))
+    sampler = None
+    for name, profile in stage_profiles.items():
+        profile.dump_stats(profile_dir.joinpath(f'main-{name}.prof'))
+
+    merge_folded(profile_dir)
+    if files := sorted(profile_dir.glob('*-*.prof')):
+        stats = pstats.Stats(*map(str, files))
+        stats.dump_stats(profile_dir.joinpath('merged.prof'))
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP)
+    print(f'Profile: {profile_dir}')
+
+
+def merge_folded(path: Path):
+    """合并所有进程的采样结果"""
+    counts = {}
+    for file in path.glob('*.folded'):
+        if file.name == 'profile.folded':
+            continue
+        for line in file.read_text().splitlines():
+            stack, _, count = line.rpartition(' ')
+            counts[stack] = counts.get(stack, 0) + int(count)
+    path.joinpath('profile.folded').write_text(''.join(f'{stack} {count}\n' for stack, count in sorted(counts.items())))
+
+
+@contextlib.contextmanager
+def profiled(stage: str):
+    """分析一个阶段，同一阶段多次运行时累计，嵌套时只分析最外层"""
+    global current_stage
+    if not profile_dir or current_stage != 'main':
+        yield
+        return
+
+    profile = stage_profiles.setdefault(stage, cProfile.Profile())
+    current_stage = stage
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        current_stage = 'main'
+
+
+def pool_initializer(initializer=None, initargs: tuple=()):
+    """进程池的initializer参数，开启分析时子进程也分析"""
+    if not profile_dir:
+        return {'initializer': initializer, 'initargs': initargs}
+    return {'initializer': init_worker_profile, 'initargs': (profile_dir, current_stage, initializer, initargs)}
+
+
+def init_worker_profile(path: Path, stage: str, initializer=None, initargs: tuple=()):
+    """子进程开始分析，进程退出时写入结果"""
+    global profile_dir, current_stage, sampler
+    profile_dir = path
+    current_stage = stage
+    pid = os.getpid()
+    sampler = stackSampler(f'worker-{pid}')
+    sampler.start()
+
+    profile = cProfile.Profile()
+    with contextlib.suppress(ValueError):
+        # fork时可能继承了父进程的分析器
+        sys.setprofile(None)
+        profile.enable()
+
+    def finish():
+        profile.disable()
+        profile.dump_stats(path.joinpath(f'worker-{pid}.prof'))
+        sampler.stop(path.joinpath(f'{pid}.folded'))
+
+    # 进程池的子进程不执行atexit
+    multiprocessing.util.Finalize(None, finish, exitpriority=10)
+    if initializer:
+        initializer(*initargs)
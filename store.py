@@ -0,0 +1,423 @@
+import gzip
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+
+from utils import *
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+"""
+论文存储
+json: data/dblp下每个会议/期刊一个文件，读写整个文件，文件格式见DATA_FORMATS
+sqlite: 单个数据库文件，按年份/论文更新，爬取时可以同时读取
+
+数据格式与JSON文件一致：{年份: [{'dblp_url': 目录地址, ...目录信息, 'papers': [论文]}]}
+jsonl/msgpack格式每条记录为一个目录：{'year': 年份, 'dblp_url': 目录地址, ...目录信息, 'papers': [论文]}
+
+python3 store.py import                     # data/dblp -> sqlite
+python3 store.py export --format json      # sqlite -> data/dblp
+python3 store.py migrate --format jsonl.zst # 转换data/dblp和data/paper的文件格式
+"""
+
+STORE_BACKEND = 'json'
+DATA_FORMAT = 'json'    # 文件格式，即文件后缀
+DATA_FORMATS = ('json', 'jsonl', 'jsonl.gz', 'jsonl.zst', 'msgpack', 'msgpack.gz', 'msgpack.zst')
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+sqlite_file = data_path.joinpath('openccf.db')
+data_format = DATA_FORMAT
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS toc (
+    dblp_url TEXT PRIMARY KEY,
+    venue TEXT NOT NULL,
+    year TEXT NOT NULL,
+    head TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS toc_venue_year ON toc (venue, year);
+CREATE TABLE IF NOT EXISTS paper (
+    id INTEGER PRIMARY KEY,
+    dblp_url TEXT NOT NULL,
+    venue TEXT NOT NULL,
+    year TEXT NOT NULL,
+    url TEXT NOT NULL,
+    title_hash TEXT NOT NULL,
+    missing INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS paper_venue_year ON paper (venue, year);
+CREATE INDEX IF NOT EXISTS paper_dblp_url ON paper (dblp_url);
+CREATE INDEX IF NOT EXISTS paper_url ON paper (url);
+CREATE INDEX IF NOT EXISTS paper_title_hash ON paper (title_hash);
+CREATE INDEX IF NOT EXISTS paper_missing ON paper (venue) WHERE missing;
+CREATE TABLE IF NOT EXISTS venue (
+    venue TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+'''
+
+
+def get_title_hash(title: str):
+    return hashlib.sha1(title.strip().lower().encode()).hexdigest()
+
+
+def json_dumps(obj) -> bytes:
+    if orjson:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+def json_loads(body):
+    return orjson.loads(body) if orjson else json.loads(body)
+
+
+def compress(body: bytes, fmt: str) -> bytes:
+    if fmt.endswith('.gz'):
+        return gzip.compress(body, GZIP_LEVEL)
+    if fmt.endswith('.zst'):
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    return body
+
+
+def decompress(body: bytes, fmt: str) -> bytes:
+    if fmt.endswith('.gz'):
+        return gzip.decompress(body)
+    if fmt.endswith('.zst'):
+        return zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    return body
+
+
+def dump_data(data: dict, fmt: str=DATA_FORMAT) -> bytes:
+    """序列化{年份: [目录]}"""
+    if fmt == 'json':
+        return json.dumps(data, indent=4, ensure_ascii=False).encode()
+
+    records = [{'year': year, **item} for year, year_data in data.items() for item in year_data]
+    if fmt.startswith('msgpack'):
+        body = b''.join(msgpack.packb(record) for record in records)
+    else:
+        body = b''.join(json_dumps(record) + b'\n' for record in records)
+    return compress(body, fmt)
+
+
+def load_data(body: bytes, fmt: str=DATA_FORMAT) -> dict:
+    if fmt == 'json':
+        return json.loads(body)
+
+    body = decompress(body, fmt)
+    if fmt.startswith('msgpack'):
+        records = msgpack.Unpacker(raw=False)
+        records.feed(body)
+    else:
+        records = (json_loads(line) for line in body.splitlines() if line)
+
+    data = {}
+    for record in records:
+        data.setdefault(record.pop('year'), []).append(record)
+    return data
+
+
+def check_format(fmt: str):
+    if fmt not in DATA_FORMATS:
+        raise ValueError(f'Unknown data format: {fmt}')
+    if fmt.startswith('msgpack') and not msgpack:
+        raise ValueError('msgpack is not installed')
+    if fmt.endswith('.zst') and not zstandard:
+        raise ValueError('zstandard is not installed')
+
+
+def split_name(file: Path):
+    """返回(文件名, 格式)，文件名中可能有点，如www.usenix.org_events.json"""
+    for fmt in sorted(DATA_FORMATS, key=len, reverse=True):
+        if file.name.endswith(f'.{fmt}'):
+            return file.name[:-len(fmt) - 1], fmt
+    return None, None
+
+
+def find_data_file(path: Path, name: str):
+    """查找任意格式的数据文件"""
+    for fmt in DATA_FORMATS:
+        file = path.joinpath(f'{name}.{fmt}')
+        if file.exists():
+            return file, fmt
+    return None, None
+
+
+def read_data(path: Path, name: str):
+    """读取数据文件，自动识别格式，不存在时返回None"""
+    file, fmt = find_data_file(path, name)
+    return load_data(file.read_bytes(), fmt) if file else None
+
+
+def write_data(path: Path, name: str, data: dict, fmt: str=None):
+    """按配置的格式写入数据文件，并删除其他格式的同名文件"""
+    fmt = fmt or data_format
+    file = path.joinpath(f'{name}.{fmt}')
+    temp = path.joinpath(f'{name}.{fmt}.tmp')
+    temp.write_bytes(dump_data(data, fmt))
+    temp.replace(file)
+
+    for other in DATA_FORMATS:
+        if other != fmt:
+            path.joinpath(f'{name}.{other}').unlink(missing_ok=True)
+    return file
+
+
+def sort_data(all_data: dict, years):
+    """目录按地址排序，论文按网址排序"""
+    for year in years:
+        for item in all_data[year]:
+            item['papers'] = sorted(item['papers'], key=lambda x: x['url'])
+        all_data[year] = sorted(all_data[year], key=lambda x: x['dblp_url'])
+
+
+class jsonStore:
+    """每个会议/期刊一个文件，读取时自动识别格式，写入时使用配置的格式"""
+
+    def __init__(self, path=dblp_path, fmt: str=None):
+        self.path = path
+        self.fmt = fmt
+
+    def get_name(self, dblp_key: str):
+        return dblp_key.replace('/', '_')
+
+    def keys(self):
+        names = {split_name(file)[0] for file in self.path.iterdir()}
+        return sorted(name.replace('_', '/', 1) for name in names if name)
+
+    def load(self, dblp_key: str):
+        return read_data(self.path, self.get_name(dblp_key)) or {}
+
+    def version(self, dblp_key: str):
+        """数据版本，文件修改后变化"""
+        file, _ = find_data_file(self.path, self.get_name(dblp_key))
+        if not file:
+            return ''
+        stat = file.stat()
+        return f'{file.name}:{stat.st_mtime_ns}:{stat.st_size}'
+
+    def write(self, dblp_key: str, data: dict):
+        write_data(self.path, self.get_name(dblp_key), data, self.fmt)
+
+    def save(self, dblp_key: str, old_data: dict, all_data: dict, years=None):
+        """合并all_data中years的数据并写入，years默认全部"""
+        years = list(all_data.keys() if years is None else years)
+        sort_data(all_data, years)
+        old_data.update({year: all_data[year] for year in years})
+        self.write(dblp_key, old_data)
+        return old_data
+
+    def update_papers(self, dblp_key: str, data: dict, papers: list):
+        """papers为data中修改过的论文[(目录地址, 论文)]，只能重写整个文件"""
+        if papers:
+            self.write(dblp_key, data)
+
+    def items(self):
+        for key in self.keys():
+            yield key, self.load(key)
+
+    def close(self):
+        pass
+
+
+class sqliteStore:
+    """SQLite存储，目录和论文各一张表，论文数据保存为JSON"""
+
+    def __init__(self, file=sqlite_file):
+        self.file = file
+        self.conn = sqlite3.connect(file, timeout=60)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+
+    def keys(self):
+        return [row[0] for row in self.conn.execute('SELECT DISTINCT venue FROM toc ORDER BY venue')]
+
+    def version(self, dblp_key: str):
+        """数据版本，每次写入时加1"""
+        row = self.conn.execute('SELECT version FROM venue WHERE venue = ?', (dblp_key,)).fetchone()
+        return str(row[0]) if row else ''
+
+    def bump_version(self, dblp_key: str):
+        self.conn.execute('INSERT INTO venue (venue, version) VALUES (?, 1) '
+                          'ON CONFLICT (venue) DO UPDATE SET version = version + 1', (dblp_key,))
+
+    def load(self, dblp_key: str):
+        data = {}
+        items = {}
+        for dblp_url, year, head in self.conn.execute(
+                'SELECT dblp_url, year, head FROM toc WHERE venue = ? ORDER BY rowid', (dblp_key,)):
+            item = {'dblp_url': dblp_url, **json.loads(head), 'papers': []}
+            items[dblp_url] = item
+            data.setdefault(year, []).append(item)
+
+        for dblp_url, paper in self.conn.execute(
+                'SELECT dblp_url, data FROM paper WHERE venue = ? ORDER BY id', (dblp_key,)):
+            items[dblp_url]['papers'].append(json.loads(paper))
+        return data
+
+    @staticmethod
+    def dump_paper(paper: dict):
+        """返回(是否缺少补充数据, JSON)"""
+        missing = not paper.get('abstract') or not paper.get('tldr')
+        return int(missing), json.dumps(paper, ensure_ascii=False)
+
+    def insert_papers(self, dblp_key: str, year: str, dblp_url: str, papers: list):
+        self.conn.executemany(
+            'INSERT INTO paper (dblp_url, venue, year, url, title_hash, missing, data) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(dblp_url, dblp_key, year, paper['url'] or '', get_title_hash(paper['title']), *self.dump_paper(paper))
+             for paper in papers]
+        )
+
+    def save(self, dblp_key: str, old_data: dict, all_data: dict, years=None):
+        """只替换years中的目录和论文，years默认全部"""
+        years = list(all_data.keys() if years is None else years)
+        sort_data(all_data, years)
+        old_data.update({year: all_data[year] for year in years})
+
+        with self.conn:
+            for year in years:
+                self.conn.execute('DELETE FROM toc WHERE venue = ? AND year = ?', (dblp_key, year))
+                self.conn.execute('DELETE FROM paper WHERE venue = ? AND year = ?', (dblp_key, year))
+                for item in all_data[year]:
+                    head = {k: v for k, v in item.items() if k not in ('dblp_url', 'papers')}
+                    self.conn.execute('INSERT OR REPLACE INTO toc (dblp_url, venue, year, head) VALUES (?, ?, ?, ?)',
+                                      (item['dblp_url'], dblp_key, year, json.dumps(head, ensure_ascii=False)))
+                    self.insert_papers(dblp_key, year, item['dblp_url'], item['papers'])
+            self.bump_version(dblp_key)
+        return old_data
+
+    def update_papers(self, dblp_key: str, data: dict, papers: list):
+        """只更新修改过的论文，papers为[(目录地址, 论文)]"""
+        with self.conn:
+            self.conn.executemany(
+                'UPDATE paper SET missing = ?, data = ? WHERE dblp_url = ? AND title_hash = ?',
+                [(*self.dump_paper(paper), dblp_url, get_title_hash(paper['title'])) for dblp_url, paper in papers]
+            )
+            self.bump_version(dblp_key)
+
+    def items(self):
+        for key in self.keys():
+            yield key, self.load(key)
+
+    def missing_papers(self, dblp_key: str=None):
+        """缺少摘要或总结的论文"""
+        sql = 'SELECT venue, year, dblp_url, data FROM paper WHERE missing'
+        args = ()
+        if dblp_key:
+            sql += ' AND venue = ?'
+            args = (dblp_key,)
+        for venue, year, dblp_url, paper in self.conn.execute(sql, args):
+            yield venue, year, dblp_url, json.loads(paper)
+
+    def close(self):
+        self.conn.close()
+
+
+_store = None
+
+
+def init_store(conf: dict):
+    """根据配置选择存储后端和文件格式"""
+    global _store, data_format
+    if _store:
+        _store.close()
+    data_format = conf.get('format', DATA_FORMAT)
+    check_format(data_format)
+    backend = conf.get('backend', STORE_BACKEND)
+    if backend == 'sqlite':
+        _store = sqliteStore(data_path.joinpath(conf['file']) if conf.get('file') else sqlite_file)
+    elif backend == 'json':
+        _store = jsonStore()
+    else:
+        raise ValueError(f'Unknown store backend: {backend}')
+    return _store
+
+
+def init_worker_store(conf: dict):
+    """子进程中重新打开存储，从父进程继承的连接不能使用，也不能关闭"""
+    global _store
+    _store = None
+    init_store(conf)
+
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = jsonStore()
+    return _store
+
+
+def copy_store(src, dst):
+    """在两个存储之间复制全部数据"""
+    total = 0
+    for key, data in src.items():
+        total += sum(len(item['papers']) for year_data in data.values() for item in year_data)
+        dst.save(key, {}, data)
+        print(key)
+    console.print(f'Venues: {len(src.keys())}\tPapers: {total}', style='bold yellow')
+
+
+def migrate_data(path: Path, fmt: str):
+    """转换目录下所有数据文件的格式，返回(原大小, 新大小, 原读取时间, 新读取时间)"""
+    old_size = new_size = old_time = new_time = 0
+    for file in sorted(path.iterdir()):
+        name, old_fmt = split_name(file)
+        if not name:
+            continue
+
+        body = file.read_bytes()
+        start = time.perf_counter()
+        data = load_data(body, old_fmt)
+        old_time += time.perf_counter() - start
+        old_size += len(body)
+
+        if old_fmt != fmt:
+            file = write_data(path, name, data, fmt)
+        body = file.read_bytes()
+        start = time.perf_counter()
+        load_data(body, fmt)
+        new_time += time.perf_counter() - start
+        new_size += len(body)
+
+    console.print(f'{path}\tSize: {old_size / 1024 / 1024:.1f} MB -> {new_size / 1024 / 1024:.1f} MB\t'
+                  f'Load: {old_time:.2f}s -> {new_time:.2f}s', style='bold yellow')
+    return old_size, new_size, old_time, new_time
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='paper store')
+    parser.add_argument('action', choices=['import', 'export', 'migrate'],
+                        help='import: data/dblp -> sqlite; export: sqlite -> data/dblp; migrate: convert data/dblp and data/paper to --format')
+    parser.add_argument('--file', type=str, default=str(sqlite_file), help='sqlite database file')
+    parser.add_argument('--format', type=str, choices=DATA_FORMATS, default=DATA_FORMAT, help='file format for export/migrate')
+    args = parser.parse_args()
+    check_format(args.format)
+
+    if args.action == 'migrate':
+        for path in (dblp_path, paper_path):
+            migrate_data(path, args.format)
+    else:
+        json_store = jsonStore(fmt=args.format)
+        sqlite_store = sqliteStore(Path(args.file))
+        if args.action == 'import':
+            copy_store(json_store, sqlite_store)
+        else:
+            copy_store(sqlite_store, json_store)
+        sqlite_store.close()
@@ -1,9 +1,24 @@
+import os
 import re
+import gzip
+import json
+import time
+import random
+import sqlite3
+import hashlib
 import aiohttp
 import asyncio
+import weakref
+import functools
+import threading
 import contextlib
+import collections
 import translators
 from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
 from fake_useragent import UserAgent
 from tenacity import retry, stop_after_attempt, wait_fixed
 
@@ -11,10 +26,45 @@ from rich import print
 from rich.console import Console
 from rich.progress import Progress, TextColumn, BarColumn, MofNCompleteColumn, TimeRemainingColumn
 
+from metrics import *
+
 
 MAX_RETRY = 5
-MAX_ROUTINE = 100
-sem = asyncio.Semaphore(MAX_ROUTINE)
+MAX_ROUTINE = 100       # 总并发连接数
+MAX_PER_HOST = 20       # 单个主机并发连接数
+DNS_CACHE_TTL = 600     # DNS缓存时间（秒）
+KEEPALIVE_TIMEOUT = 60  # 空闲连接保持时间（秒）
+UA_POOL_SIZE = 50       # 预生成的UA数量
+MAX_BACKOFF = 60        # 最长退避时间（秒）
+CACHE_TTL_OPEN = 0                  # 未结束的年份，每次都重新验证
+CACHE_TTL_CLOSED = 30 * 24 * 3600   # 已结束的年份，基本不会变化
+LOOP_LAG_INTERVAL = 0.1             # 事件循环延迟的检查间隔（秒）
+LOOP_LAG_THRESHOLD = 0.05           # 延迟超过后视为被阻塞（秒）
+FILTER_PROCESSES = 0                # 过滤论文的进程数，0表示在主进程中过滤
+FILTER_MATCH_ZH = False             # 是否使用配置中的中文关键词匹配翻译字段
+TRANSLATE_CACHE_SIZE = 10000        # 内存中缓存的译文数量
+TRANSLATE_LANG = 'zh'
+TRANSLATE_WORKERS = 8               # 批量翻译的线程数
+TRANSLATE_FLUSH_INTERVAL = 30       # 批量翻译时写入结果的间隔（秒）
+TRANSLATE_MAX_FAILURES = 5          # 翻译器连续失败次数达到后暂停使用
+TRANSLATE_COOLDOWN = 60             # 翻译器暂停使用的时间（秒）
+BLOCKING_THREADS = 8                # 执行同步调用的线程数
+# 按顺序尝试的翻译器及参数
+TRANSLATORS = (('sogou', {}), ('google', {'to_language': 'zh'}))
+
+# 每个事件循环一个连接池，asyncio对象不能跨事件循环使用
+_clients = weakref.WeakKeyDictionary()
+http_stats = {'requests': 0, 'cache_hits': 0, 'not_modified': 0}
+# 每个主机的限速配置和状态，所有调用方共用
+host_conf = {'default': {'rate': 10, 'burst': 10, 'concurrency': 10}}
+host_limiters = {}
+translate_stats = {'hits': 0, 'misses': 0, 'failures': 0}
+loop_stats = {'samples': 0, 'stalls': 0, 'blocked': 0.0, 'max_lag': 0.0}
+# 每个翻译器的限速配置和状态，所有线程共用
+translator_conf = {'sogou': {'rate': 5, 'burst': 5}, 'google': {'rate': 5, 'burst': 5}}
+translator_limiters = {}
+translator_state = {}
+translator_lock = threading.Lock()
 
 console = Console()
 
@@ -28,6 +78,12 @@ paper_path = data_path.joinpath('paper')
 paper_path.mkdir(exist_ok=True)
 history_path = data_path.joinpath('history')
 history_path.mkdir(exist_ok=True)
+manifest_path = data_path.joinpath('manifest')
+manifest_path.mkdir(exist_ok=True)
+cache_path = root_path.joinpath('cache')
+http_cache_path = cache_path.joinpath('http')
+http_cache_path.mkdir(parents=True, exist_ok=True)
+translate_cache_file = cache_path.joinpath('translate.db')
 
 
 def progress():
@@ -40,89 +96,594 @@ def progress():
     )
 
 
+class translateCache:
+    """翻译缓存：原文哈希+翻译器+目标语言 -> 译文
+    内存中保留最近使用的size条，全部结果保存在SQLite中
+    """
+
+    def __init__(self, file=translate_cache_file, size: int=TRANSLATE_CACHE_SIZE):
+        self.size = size
+        self.memory = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(file, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS translation (key TEXT PRIMARY KEY, result TEXT NOT NULL, time REAL NOT NULL)')
+
+    @staticmethod
+    def get_key(text: str, translator: str, lang: str):
+        return f'{hashlib.sha1(text.encode()).hexdigest()}:{translator}:{lang}'
+
+    def remember(self, key: str, result: str):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.size:
+            self.memory.popitem(last=False)
+
+    def get(self, text: str, translator: str, lang: str):
+        key = self.get_key(text, translator, lang)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                return self.memory[key]
+            row = self.conn.execute('SELECT result FROM translation WHERE key = ?', (key,)).fetchone()
+            if row:
+                self.remember(key, row[0])
+                return row[0]
+        return None
+
+    def put(self, text: str, translator: str, lang: str, result: str):
+        key = self.get_key(text, translator, lang)
+        with self.lock:
+            self.remember(key, result)
+            self.conn.execute('INSERT OR REPLACE INTO translation (key, result, time) VALUES (?, ?, ?)',
+                              (key, result, time.time()))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+@functools.lru_cache
+def get_translate_cache():
+    return translateCache()
+
+
+def init_translate(conf: dict):
+    """根据配置设置翻译器限速"""
+    for name, value in conf.get('translators', {}).items():
+        translator_conf[name] = {**translator_conf.get(name, {}), **value}
+    translator_limiters.clear()
+
+
+def get_translator_limiter(translator: str):
+    with translator_lock:
+        if translator not in translator_limiters:
+            conf = translator_conf.get(translator, {'rate': 5, 'burst': 5})
+            translator_limiters[translator] = rateLimiter(conf['rate'], conf['burst'])
+        return translator_limiters[translator]
+
+
+def translate_text(text: str, translator: str, **kwargs):
+    """调用一个翻译器，连续失败过多时暂停使用一段时间，其他线程直接跳过，不会在失败的翻译器上排队"""
+    state = translator_state.setdefault(translator, {'failures': 0, 'until': 0})
+    if state['until'] > time.monotonic():
+        return ''
+
+    get_translator_limiter(translator).wait()
+    try:
+        result = translators.translate_text(text, translator=translator, **kwargs)
+    except Exception:
+        with translator_lock:
+            translate_stats['failures'] += 1
+            state['failures'] += 1
+            # 已经暂停时，其他线程的失败不再重复计数
+            if state['failures'] >= TRANSLATE_MAX_FAILURES and state['until'] <= time.monotonic():
+                state['failures'] = 0
+                state['until'] = time.monotonic() + TRANSLATE_COOLDOWN
+                console.print(f'Translator {translator} paused for {TRANSLATE_COOLDOWN}s', style='bold red')
+        return ''
+
+    state['failures'] = 0
+    return result or ''
+
+
 def get_translate(text: str):
-    """sogou速度较快，优先使用；google作为补充"""
-    if text:
-        result = ''
-        with contextlib.suppress(Exception):
-            result = translators.translate_text(text, translator='sogou')
+    """sogou速度较快，优先使用；google作为补充，成功的结果写入缓存，可以在多个线程中调用"""
+    if not text:
+        return ''
 
-        if result.isascii():
-            with contextlib.suppress(Exception):
-                result = translators.translate_text(text, translator='google', to_language='zh')
+    cache = get_translate_cache()
+    for translator, _ in TRANSLATORS:
+        if result := cache.get(text, translator, TRANSLATE_LANG):
+            translate_stats['hits'] += 1
+            return result
+    translate_stats['misses'] += 1
 
-        if not result.isascii():
+    for translator, kwargs in TRANSLATORS:
+        result = translate_text(text, translator, **kwargs)
+        if result and not result.isascii():
+            cache.put(text, translator, TRANSLATE_LANG, result)
             return result
 
     return ''
 
 
-async def fetch(url: str, headers: dict = None, params: dict=None, proxy: bool=False):
+@functools.lru_cache
+def get_user_agents():
+    """预生成UA列表，避免每次请求都加载UA数据库"""
+    ua = UserAgent()
+    return [ua.random for _ in range(UA_POOL_SIZE)]
+
+
+def get_client():
+    """获取当前事件循环共享的连接池"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client['session'].closed:
+        connector = aiohttp.TCPConnector(
+            limit=MAX_ROUTINE,
+            limit_per_host=MAX_PER_HOST,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT
+        )
+        client = {
+            'session': aiohttp.ClientSession(connector=connector),
+            'sem': asyncio.Semaphore(MAX_ROUTINE)
+        }
+        _clients[loop] = client
+    return client
+
+
+async def close_client():
+    """关闭当前事件循环的连接池，需在loop.close()之前调用"""
+    loop = asyncio.get_running_loop()
+    if client := _clients.pop(loop, None):
+        await client['session'].close()
+
+
+def init_http(conf: dict):
+    """根据配置设置并发数和主机限速，需在创建连接池之前调用"""
+    global MAX_ROUTINE, MAX_PER_HOST
+    MAX_ROUTINE = conf.get('concurrency', MAX_ROUTINE)
+    MAX_PER_HOST = conf.get('per_host', MAX_PER_HOST)
+    host_conf.update(conf.get('hosts', {}))
+    host_limiters.clear()
+
+
+def set_host_limit(host: str, **kwargs):
+    """设置主机的默认限速，配置文件中已有的优先"""
+    if host not in host_conf:
+        host_conf[host] = {**host_conf['default'], **kwargs}
+        host_limiters.pop(host, None)
+
+
+def get_host_limiter(url: str):
+    host = urlparse(url).hostname or ''
+    if host not in host_limiters:
+        conf = host_conf.get(host) or host_conf['default']
+        host_limiters[host] = hostLimiter(**conf)
+    return host_limiters[host]
+
+
+def run_tasks(loop, tasks: list):
+    """在事件循环中等待所有任务完成，并释放连接池"""
+    try:
+        return loop.run_until_complete(asyncio.wait(tasks))
+    finally:
+        loop.run_until_complete(close_client())
+
+
+def cache_ttl(year: str='') -> int:
+    """往年的论文集基本不会变化，视为不可变；今年和去年的需要重新验证"""
+    year = year[:4]
+    if year.isdigit() and int(year) < datetime.now().year - 1:
+        return CACHE_TTL_CLOSED
+    return CACHE_TTL_OPEN
+
+
+def cache_file(url: str):
+    return http_cache_path.joinpath(f'{hashlib.sha1(url.encode()).hexdigest()}.json.gz')
+
+
+def cache_load(url: str):
+    """读取缓存的响应，以文件修改时间为缓存时间"""
+    file = cache_file(url)
+    try:
+        entry = json.loads(gzip.decompress(file.read_bytes()))
+        entry['time'] = file.stat().st_mtime
+        return entry
+    except Exception:
+        return None
+
+
+def cache_save(url: str, body: str, etag: str=None, last_modified: str=None):
+    """缓存响应内容及ETag/Last-Modified"""
+    entry = {'url': url, 'etag': etag, 'last_modified': last_modified, 'body': body}
+    with contextlib.suppress(Exception):
+        cache_file(url).write_bytes(gzip.compress(json.dumps(entry, ensure_ascii=False).encode()))
+
+
+def cache_touch(url: str):
+    """304时只更新缓存时间，不重写内容"""
+    with contextlib.suppress(Exception):
+        os.utime(cache_file(url))
+
+
+@functools.lru_cache
+def get_blocking_executor():
+    """同步的第三方库、翻译和缓存读写使用单独的线程池，线程数即并发上限"""
+    return ThreadPoolExecutor(BLOCKING_THREADS, thread_name_prefix='blocking')
+
+
+async def run_blocking(func, *args):
+    """在线程池中执行同步调用，不阻塞事件循环"""
+    return await asyncio.get_running_loop().run_in_executor(get_blocking_executor(), functools.partial(func, *args))
+
+
+def cache_headers(entry: dict):
+    """条件请求头"""
+    headers = {}
+    if entry:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def cache_fresh(entry: dict, ttl: int):
+    return entry and time.time() - entry['time'] < ttl
+
+
+class rateLimiter:
+    """令牌桶限速
+    只依赖时间计算，不绑定事件循环，可以在多个事件循环中共用
+    """
+
+    def __init__(self, rate: float, burst: int=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        """获取一个令牌，返回需要等待的时间"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        while wait := self.take():
+            await asyncio.sleep(wait)
+
+    def wait(self):
+        """在线程中同步获取令牌"""
+        while wait := self.take():
+            time.sleep(wait)
+
+
+class hostLimiter:
+    """单个主机的限速和自适应并发
+    令牌桶控制请求速率；并发上限按AIMD调整，成功时缓慢增加，429/5xx/超时时减半，
+    并遵守Retry-After
+    """
+
+    def __init__(self, rate: float, burst: int=1, concurrency: int=10, min_concurrency: int=1):
+        self.bucket = rateLimiter(rate, burst)
+        self.max = concurrency
+        self.min = min_concurrency
+        self.limit = float(concurrency)
+        self.inflight = 0
+        self.blocked_until = 0
+        # 等待并发名额的future，每个属于创建它的事件循环，所以不用asyncio.Condition
+        self.waiters = collections.deque()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            if now < self.blocked_until:
+                await asyncio.sleep(self.blocked_until - now)
+            elif self.inflight >= int(self.limit):
+                waiter = asyncio.get_running_loop().create_future()
+                self.waiters.append(waiter)
+                try:
+                    await waiter
+                except asyncio.CancelledError:
+                    # 被唤醒后取消，把名额交给下一个等待者
+                    self.wake()
+                    raise
+                finally:
+                    with contextlib.suppress(ValueError):
+                        self.waiters.remove(waiter)
+            elif wait := self.bucket.take():
+                await asyncio.sleep(wait)
+            else:
+                self.inflight += 1
+                return
+
+    def wake(self):
+        """唤醒与空闲名额数量相同的等待者，被唤醒后重新检查"""
+        free = int(self.limit) - self.inflight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    def release(self, ok: bool=None, retry_after: float=None):
+        """ok为None表示与拥塞无关的结果，如404"""
+        self.inflight -= 1
+        if ok:
+            self.limit = min(self.max, self.limit + 1 / self.limit)
+        elif ok is False:
+            self.limit = max(self.min, self.limit / 2)
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        self.wake()
+
+
+async def monitor_loop_lag(interval: float=LOOP_LAG_INTERVAL):
+    """定期检查事件循环的延迟，统计被同步调用阻塞的时间，需作为任务运行并在结束时取消"""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = loop.time() - start - interval
+        loop_stats['samples'] += 1
+        loop_stats['max_lag'] = max(loop_stats['max_lag'], lag)
+        if lag > LOOP_LAG_THRESHOLD:
+            loop_stats['stalls'] += 1
+            loop_stats['blocked'] += lag
+
+
+def get_retry_after(response):
+    """解析Retry-After，支持秒数和HTTP日期"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    with contextlib.suppress(Exception):
+        return min(float(value), MAX_BACKOFF)
+    with contextlib.suppress(Exception):
+        return min(max(parsedate_to_datetime(value).timestamp() - time.time(), 0), MAX_BACKOFF)
+    return None
+
+
+async def fetch(url: str, headers: dict = None, params: dict=None, proxy: bool=False, ttl: int=None,
+                method: str='GET', data: dict=None):
+    """异步请求，data为JSON请求体；ttl不为None时使用条件请求缓存"""
     if headers is None:
         headers = {}
-    headers['User-Agent'] = UserAgent().random
+    headers['User-Agent'] = random.choice(get_user_agents())
+    client = get_client()
+    session = client['session']
+
+    entry = None
+    if ttl is not None:
+        entry = await run_blocking(cache_load, url)
+        if cache_fresh(entry, ttl):
+            http_stats['cache_hits'] += 1
+            return entry['body']
+        headers.update(cache_headers(entry))
 
-    for _ in range(MAX_RETRY):
+    limiter = get_host_limiter(url)
+    for attempt in range(MAX_RETRY):
+        backoff = min(2 ** attempt, MAX_BACKOFF)
+        ok = False
+        retry_after = None
+        status = 'error'
+        await limiter.acquire()
+        start = time.perf_counter()
         try:
-            async with sem, aiohttp.ClientSession() as session:
+            async with client['sem']:
+                http_stats['requests'] += 1
+                start = time.perf_counter()
                 if proxy and 'doi.org' in url:
                     payload = {'api_key': ScraperAPI, 'url': url}
                     async with session.get(url, headers=headers, payload=payload) as response:
+                        status = response.status
                         if response.status == 200:
-                            return await response.text()
+                            text = await response.text()
+                            ok = True
+                            return text
                 else:
-                    async with session.get(url, headers=headers, params=params) as response:
+                    async with session.request(method, url, headers=headers, params=params, json=data) as response:
+                        status = response.status
                         if response.status == 200:
-                            return await response.text()
+                            text = await response.text()
+                            if ttl is not None:
+                                await run_blocking(cache_save, url, text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+                            ok = True
+                            return text
+
+            # 未修改，使用缓存
+            if response.status == 304 and entry:
+                ok = True
+                http_stats['not_modified'] += 1
+                await run_blocking(cache_touch, url)
+                return entry['body']
 
-            # 超出频率限制
-            if response.status == 429:
-                await asyncio.sleep(1)
+            # 超出频率限制或服务端错误，整个主机暂停
+            if response.status == 429 or response.status >= 500:
+                retry_after = get_retry_after(response) or backoff
                 continue
 
+            ok = None
             console.print(f'Request failed: {response.status} {url}', style='bold red')
             return None
         except Exception:
-            await asyncio.sleep(1)
+            pass
+        finally:
+            limiter.release(ok, retry_after)
+            record_request(url, status, time.perf_counter() - start)
+
+        # 超时或连接错误
+        await asyncio.sleep(backoff)
 
     if 'api.semanticscholar.org' not in url:
         console.print(f'Request failed: max {url}', style='bold red')
     return None
 
 
-def get_keywords(paper: dict, keywords: list):
-    """过滤关键词"""
-    key_set = set()
+async def post_json(url: str, headers: dict, data: dict, limiter: rateLimiter, get_code=None, limit_codes: tuple=(),
+                    max_retry: int=MAX_RETRY):
+    """使用共享连接池POST JSON，HTTP 429/5xx或错误码在limit_codes中时退避重试
+    get_code(结果, HTTP状态码)返回错误码，默认为HTTP状态码
+    返回(结果, 错误码)，请求失败时结果为None
+    """
+    session = get_client()['session']
+    result = None
+    code = None
+    for attempt in range(max_retry):
+        backoff = min(2 ** attempt, MAX_BACKOFF)
+        await limiter.acquire()
+        status = 'error'
+        start = time.perf_counter()
+        elapsed = None
+        try:
+            http_stats['requests'] += 1
+            async with session.post(url, headers=headers, json=data) as response:
+                status = response.status
+                result = await response.json(content_type=None)
+                elapsed = time.perf_counter() - start
+                code = get_code(result, response.status) if get_code else response.status
+                if response.status == 429 or response.status >= 500 or code in limit_codes:
+                    await asyncio.sleep(get_retry_after(response) or backoff)
+                    continue
+                return result, code
+        except Exception:
+            # 超时或连接错误
+            elapsed = elapsed or time.perf_counter() - start
+            await asyncio.sleep(backoff)
+        finally:
+            record_request(url, status, elapsed or time.perf_counter() - start)
+
+    return result, code
+
+
+def trie_regex(keywords: list):
+    """把关键词合并为前缀树形式的正则，忽略大小写，同一位置优先匹配更长的关键词"""
+    trie = {}
     for key in keywords:
-        pattern = re.compile(rf'\b{re.escape(key)}(?!\w)', re.IGNORECASE)
+        node = trie
+        for ch in key:
+            lower = ch.lower()
+            node = node.setdefault(lower if len(lower) == 1 else ch, {})
+        node[''] = {}
 
-        if paper['title'] and re.search(pattern, paper['title']):
-            key_set.add(key)
-        elif paper['abstract'] and re.search(pattern, paper['abstract']):
-            key_set.add(key)
-        elif paper['tldr'] and re.search(pattern, paper['tldr']):
-            key_set.add(key)
+    def build(node: dict):
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        pattern = branches[0] if len(branches) == 1 else f'(?:{"|".join(branches)})'
+        # 贪婪匹配，先尝试更长的关键词，失败后回溯到这里结束
+        return f'(?:{pattern})?' if '' in node else pattern
 
-    return sorted(key_set)
+    return build(trie)
 
 
-def filter_keywords(data: dict, keywords: list):
-    """通过关键词筛选相关论文"""
-    results = []
+class keywordMatcher:
+    """多关键词匹配器，与逐个关键词匹配rf'\\b{key}(?!\\w)'（忽略大小写）的结果相同
+    所有关键词合并为一个前缀树正则，用零宽断言在每个位置只取最长的一个，
+    同一位置上更短的关键词（最长关键词的前缀）再单独检查
+    中文等非ASCII关键词没有单词边界，在翻译后的中文字段中按子串匹配
+    """
+
+    def __init__(self, keywords: list):
+        keywords = list(dict.fromkeys(keywords))
+        self.keywords = [key for key in keywords if key.isascii()]
+        self.keywords_zh = {key: key.lower() for key in keywords if not key.isascii()}
+        self.patterns = {key: re.compile(rf'{re.escape(key)}(?!\w)', re.IGNORECASE) for key in self.keywords}
+        # 小写 -> 关键词，大小写不同的关键词可能有多个
+        self.lower = {}
+        for key in self.keywords:
+            self.lower.setdefault(key.lower(), []).append(key)
+        # 关键词 -> 是它前缀的更短关键词
+        self.prefixes = {
+            key: [k for k in self.keywords if k != key and len(k) <= len(key) and key.lower().startswith(k.lower())]
+            for key in self.keywords
+        }
+
+        self.regex = re.compile(rf'(?=\b({trie_regex(self.keywords)})(?!\w))', re.IGNORECASE) if self.keywords else None
+
+    def get_keys(self, text: str):
+        """匹配到的文本对应的关键词"""
+        if keys := self.lower.get(text.lower()):
+            return keys
+        return [key for key in self.keywords if self.patterns[key].fullmatch(text)]
+
+    def match(self, text: str):
+        """返回text中出现的所有关键词"""
+        found = set()
+        if not text or not self.regex:
+            return found
+
+        for m in self.regex.finditer(text):
+            for key in self.get_keys(m[1]):
+                found.add(key)
+                for k in self.prefixes[key]:
+                    if k not in found and self.patterns[k].match(text, m.start()):
+                        found.add(k)
+        return found
+
+    def match_zh(self, text: str):
+        """返回中文text中出现的所有非ASCII关键词"""
+        if not text or not self.keywords_zh:
+            return set()
+        text = text.lower()
+        return {key for key, lower in self.keywords_zh.items() if lower in text}
+
+
+@functools.lru_cache(maxsize=64)
+def get_matcher(keywords: tuple):
+    """每组关键词只编译一次"""
+    return keywordMatcher(keywords)
+
+
+def get_paper_text(paper: dict):
+    """标题、摘要、总结用换行连接，边界与分别匹配时相同"""
+    return '\n'.join(filter(None, (paper.get('title'), paper.get('abstract'), paper.get('tldr'))))
+
+
+def get_paper_text_zh(paper: dict):
+    """翻译后的标题、摘要、总结"""
+    return '\n'.join(filter(None, (paper.get('title_zh'), paper.get('abstract_zh'), paper.get('tldr_zh'))))
+
+
+def get_keywords(paper: dict, keywords):
+    """过滤关键词，keywords可以是关键词列表或keywordMatcher"""
+    matcher = keywords if isinstance(keywords, keywordMatcher) else get_matcher(tuple(keywords))
+    return sorted(matcher.match(get_paper_text(paper)) | matcher.match_zh(get_paper_text_zh(paper)))
+
+
+def filter_categories(data: dict, matchers: dict):
+    """一次遍历同时筛选多个类别，matchers为{类别: keywordMatcher}
+    返回{类别: 论文列表}，论文为带有年份、刊物和关键词的副本，不修改data
+    """
+    results = {category: [] for category in matchers}
     for year, year_data in data.items():
         for item in year_data:
-            dblp_url = item['dblp_url']
-            conf_title = item.get('journals_title') or item.get('conf_title') or ''
-            conf_url = item.get('journals_url') or item.get('conf_url') or ''
+            head = {
+                'year': year,
+                'dblp_url': item['dblp_url'],
+                'conf_title': item.get('journals_title') or item.get('conf_title') or '',
+                'conf_url': item.get('journals_url') or item.get('conf_url') or '',
+            }
             for paper in item['papers']:
-                if key := get_keywords(paper, keywords):
-                    paper.update({
-                        'year': year,
-                        'dblp_url': dblp_url,
-                        'conf_title': conf_title,
-                        'conf_url': conf_url,
-                        'keywords': key
-                    })
-                    results.append(paper)
+                text = get_paper_text(paper)
+                text_zh = get_paper_text_zh(paper)
+                for category, matcher in matchers.items():
+                    if key := matcher.match(text) | matcher.match_zh(text_zh):
+                        results[category].append({**paper, **head, 'keywords': sorted(key)})
 
     return results
+
+
+def filter_keywords(data: dict, keywords: list):
+    """通过关键词筛选相关论文"""
+    return filter_categories(data, {'': get_matcher(tuple(keywords))})['']